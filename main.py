@@ -5,13 +5,24 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import pandas as pd
 import numpy as np
+import matplotlib
+# Графики встраиваются через FigureCanvasTkAgg, pyplot достаточно чистого Agg
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
 import seaborn as sns
 from datetime import datetime, timedelta
 import sqlite3
 import json
 import os
+import re
+import html
+import string
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import webbrowser
 import tempfile
 from fpdf import FPDF
@@ -22,10 +33,8 @@ warnings.filterwarnings('ignore')
 # Проверка scikit-learn
 try:
     from sklearn.model_selection import train_test_split
-    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.ensemble import HistGradientBoostingRegressor
     from sklearn.metrics import mean_absolute_error, r2_score
-    from sklearn.linear_model import LinearRegression
-    from sklearn.preprocessing import PolynomialFeatures
     SKLEARN_AVAILABLE = True
 except ImportError as e:
     SKLEARN_AVAILABLE = False
@@ -54,11 +63,374 @@ try:
 except ImportError as e:
     STATSMODELS_AVAILABLE = False
 
+# Проверка pmdarima (пошаговый автоподбор ARIMA)
+try:
+    from pmdarima import auto_arima
+    PMDARIMA_AVAILABLE = True
+except ImportError as e:
+    PMDARIMA_AVAILABLE = False
+
+# Проверка joblib (параллельный перебор параметров ARIMA)
+try:
+    from joblib import Parallel, delayed
+    JOBLIB_AVAILABLE = True
+except ImportError as e:
+    JOBLIB_AVAILABLE = False
+
+# Проверка bottleneck (быстрые C-редукции для небольших массивов)
+try:
+    import bottleneck as bn
+    _nanmean, _nanmedian, _nanmax, _nanmin = bn.nanmean, bn.nanmedian, bn.nanmax, bn.nanmin
+    pd.set_option('compute.use_bottleneck', True)
+    BOTTLENECK_AVAILABLE = True
+except ImportError as e:
+    _nanmean, _nanmedian, _nanmax, _nanmin = np.nanmean, np.nanmedian, np.nanmax, np.nanmin
+    BOTTLENECK_AVAILABLE = False
+
+# Проверка numba (JIT-компиляция вычислительных циклов)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError as e:
+    NUMBA_AVAILABLE = False
+
+# Проверка pyarrow (колоночные форматы Parquet/Feather)
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError as e:
+    PYARROW_AVAILABLE = False
+
 # Настройка стиля для matplotlib
 plt.style.use('default')
 plt.rcParams['font.family'] = ['DejaVu Sans']
 plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
+plt.ioff()  # Без неявных перерисовок: холсты обновляются явно через draw/draw_idle
+
+
+@functools.lru_cache(maxsize=32)
+def _palette(cmap_name, start, stop, n):
+    """Палитра из n цветов цветовой карты (кешируется, только для чтения)"""
+    colors = plt.get_cmap(cmap_name)(np.linspace(start, stop, n))
+    colors.setflags(write=False)
+    return colors
+
+
+def _user_columns(data):
+    """Данные без служебной колонки 'Дата_dt' - для показа, выгрузки и отправки во внешние сервисы"""
+    return data.drop(columns='Дата_dt', errors='ignore')
+
+
+def _growth_rate(region_codes, years, values, n_regions, year_last, year_prev):
+    """Темп роста (%) по регионам между двумя годами по тройкам (регион, год, значение)"""
+    valid = region_codes >= 0
+    sel_last = valid & (years == year_last)
+    sel_prev = valid & (years == year_prev)
+    last = np.bincount(region_codes[sel_last], weights=values[sel_last], minlength=n_regions)
+    prev = np.bincount(region_codes[sel_prev], weights=values[sel_prev], minlength=n_regions)
+    return (last - prev) / np.where(prev == 0, 1.0, prev) * 100
+
+
+def _annotate_counts(ax, values):
+    """Подписи ненулевых ячеек тепловой карты: светлый текст для значений выше половины максимума"""
+    values = np.asarray(values, dtype=np.float64)
+    rows, cols = np.nonzero(values > 0)
+    if rows.size == 0:
+        return
+    cell_values = values[rows, cols]
+    labels = np.char.mod('%d', cell_values.astype(np.int64))
+    colors = np.where(cell_values > values.max() * 0.5, 'white', 'black')
+    for i, j, label, color in zip(rows.tolist(), cols.tolist(), labels, colors):
+        ax.text(j, i, label, ha='center', va='center', color=color, fontsize=8, fontweight='bold')
+
+
+def _top_k(series, k):
+    """k наибольших значений Series по убыванию: argpartition O(n) вместо полной сортировки"""
+    values = series.to_numpy(dtype=float)
+    k = min(k, values.size)
+    if k == 0:
+        return series.iloc[:0]
+    idx = np.argpartition(-values, k - 1)[:k]
+    idx = idx[np.argsort(-values[idx], kind='stable')]
+    return series.iloc[idx]
+
+
+def _chrono_split(X, y, test_size):
+    """Хронологическое разбиение: последние ceil(test_size * n) наблюдений - тестовые (срезы без копий)"""
+    split = len(X) - int(np.ceil(test_size * len(X)))
+    return X[:split], X[split:], y[:split], y[split:]
+
+
+def _xgb_step_features(history, recent, i, period, month, trend, season_sin, season_cos, out):
+    """Признаки i-го шага рекурсивного прогноза XGBoost в out (10 значений)
+
+    recent - три последних исторических значения, затем уже полученные прогнозы.
+    """
+    if i == 0:
+        lag_1, lag_2, lag_3 = history[-1], history[-2], history[-3]
+        ma_3 = (history[-1] + history[-2] + history[-3]) / 3.0
+        if history.shape[0] > 5:
+            ma_6 = 0.0
+            for k in range(1, 7):
+                ma_6 += history[-k]
+            ma_6 /= 6.0
+        else:
+            ma_6 = lag_1
+    else:
+        lag_1 = recent[i + 2]
+        lag_2 = recent[i + 1] if i > 1 else history[-1]
+        lag_3 = recent[i] if i > 2 else history[-1]
+        ma_3 = (recent[i] + recent[i + 1] + recent[i + 2]) / 3.0
+        start = i - 3 if i > 3 else 0
+        ma_6 = 0.0
+        for k in range(start, i + 3):
+            ma_6 += recent[k]
+        ma_6 /= i + 3 - start
+    out[0] = period
+    out[1] = month
+    out[2] = trend
+    out[3] = lag_1
+    out[4] = lag_2
+    out[5] = lag_3
+    out[6] = ma_3
+    out[7] = ma_6
+    out[8] = season_sin
+    out[9] = season_cos
+
+
+if NUMBA_AVAILABLE:
+    # Скалярная логика без изменений: компилируется в машинный код
+    _xgb_step_features = njit(cache=True)(_xgb_step_features)
+
+
+def _rolling_mean(values, window):
+    """Скользящее среднее с min_periods=1 по разностям накопленных сумм"""
+    values = np.asarray(values, dtype=np.float64)
+    cs = np.empty(values.size + 1)
+    cs[0] = 0.0
+    np.cumsum(values, out=cs[1:])
+    out = np.empty(values.size)
+    head = min(window - 1, values.size)
+    out[:head] = cs[1:head + 1] / np.arange(1, head + 1)
+    out[head:] = (cs[window:] - cs[:-window]) / window
+    return out
+
+
+def _lag_matrix(values, lags):
+    """Матрица лагов 1..lags одним массивом (n, lags) с NaN в начале"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full((values.size, lags), np.nan)
+    for k in range(1, lags + 1):
+        out[k:, k - 1] = values[:-k]
+    return out
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _rolling_mean(values, window):
+        """Скользящее среднее с min_periods=1: один проход с бегущей суммой"""
+        n = values.shape[0]
+        out = np.empty(n)
+        total = 0.0
+        for i in range(n):
+            total += values[i]
+            if i >= window:
+                total -= values[i - window]
+            out[i] = total / min(i + 1, window)
+        return out
+
+    @njit(cache=True)
+    def _lag_matrix(values, lags):
+        """Матрица лагов 1..lags за один проход по ряду"""
+        n = values.shape[0]
+        out = np.empty((n, lags))
+        for i in range(n):
+            for k in range(1, lags + 1):
+                out[i, k - 1] = values[i - k] if i >= k else np.nan
+        return out
+
+
+def _lr_design_matrix(start, months):
+    """Признаки линейной регрессии в одном массиве: тренд, sin/cos месяца, квадратичный тренд"""
+    months = np.asarray(months, dtype=np.float64)
+    X = np.empty((months.size, 4), dtype=np.float64)
+    idx = X[:, 0]
+    idx[:] = np.arange(start, start + months.size)
+    angle = months * (2 * np.pi / 12)
+    np.sin(angle, out=X[:, 1])
+    np.cos(angle, out=X[:, 2])
+    np.multiply(idx, idx, out=X[:, 3])
+    return X
+
+
+def _regression_metrics(actual, predicted):
+    """MAE и R² по одному массиву остатков (те же значения, что mean_absolute_error и r2_score)"""
+    actual = np.asarray(actual, dtype=np.float64)
+    residuals = actual - np.asarray(predicted, dtype=np.float64)
+    centered = actual - actual.mean()
+    mae = float(np.abs(residuals).mean())
+    ss_res = float(np.einsum('i,i->', residuals, residuals))
+    ss_tot = float(np.einsum('i,i->', centered, centered))
+    if ss_tot == 0:
+        return mae, 1.0 if ss_res == 0 else 0.0
+    return mae, 1 - ss_res / ss_tot
+
+
+def _linear_fit(X, y):
+    """Коэффициенты МНК со свободным членом (последний элемент) через np.linalg.lstsq"""
+    A = np.empty((X.shape[0], X.shape[1] + 1))
+    A[:, :-1] = X
+    A[:, -1] = 1.0
+    coef = np.linalg.lstsq(A, y, rcond=None)[0]
+    return coef
+
+
+def _linear_predict(X, coef):
+    """Предсказание по коэффициентам _linear_fit"""
+    return X @ coef[:-1] + coef[-1]
+
+
+def _fit_arima_order(series, order):
+    """AIC модели ARIMA с заданным порядком: (AIC, порядок) или (inf, порядок)"""
+    try:
+        return ARIMA(series, order=order).fit().aic, order
+    except Exception:
+        return float('inf'), order
+
+
+def _trend_season_path(trend_coef, seasonal_component, last_month, n_hist, periods):
+    """Неотрицательные значения тренда плюс сезонности на periods шагов вперед"""
+    steps = np.arange(periods)
+    trend = trend_coef[0] * (n_hist + steps) + trend_coef[1]
+    return np.maximum(trend + seasonal_component[(last_month + steps) % 12], 0)
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _trend_season_path(trend_coef, seasonal_component, last_month, n_hist, periods):
+        """Неотрицательные значения тренда плюс сезонности: компилируемый цикл"""
+        out = np.empty(periods)
+        for i in range(periods):
+            value = trend_coef[0] * (n_hist + i) + trend_coef[1] + seasonal_component[(last_month + i) % 12]
+            out[i] = value if value > 0 else 0.0
+        return out
+
+
+def _trend_seasonal_forecast(values, last_month, periods):
+    """Прогноз по линейному тренду и 12-месячной сезонной компоненте"""
+    values = np.asarray(values, dtype=float)
+    n = values.size
+    trend_coef = np.polyfit(np.arange(n), values, 1)
+
+    # Сезонная компонента: среднее по позициям i, i+12, ... минус общее среднее
+    positions = np.arange(n) % 12
+    counts = np.bincount(positions, minlength=12)
+    sums = np.bincount(positions, weights=values, minlength=12)
+    seasonal_component = np.zeros(12)
+    observed = counts > 0
+    seasonal_component[observed] = sums[observed] / counts[observed] - values.mean()
+
+    return _trend_season_path(trend_coef, seasonal_component, int(last_month), n, int(periods))
+
+
+# Буфер записи экспортируемых отчетов: крупные блоки вместо системных вызовов по 8 КБ
+_EXPORT_BUFFER_SIZE = 128 * 1024
+
+# Замена псевдографики рамок отчета на ASCII и символы вне BMP (эмодзи), не поддерживаемые шрифтом PDF
+_BOX_CHARS_TABLE = str.maketrans({'═': '=', '║': '|'})
+_NON_BMP_CHARS = re.compile('[^\u0000-\uFFFF]')
+
+# Маркеры строк-заголовков отчета (выделяются жирным при экспорте в Excel)
+_REPORT_HEADER_MARKERS = re.compile('ОТЧЕТ|АНАЛИЗ|СТАТИСТИКА|═══')
+
+# Таблица RTF: экранирование \, { и }, рамки в ASCII, переводы строк в \par
+_RTF_TABLE = str.maketrans({'\\': '\\\\', '{': '\\{', '}': '\\}', '═': '=', '║': '|', '\n': r'\par '})
+
+# Шаблон HTML-отчета: статичная разметка и стили собираются один раз при импорте
+_HTML_TEMPLATE = string.Template("""
+<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Медицинский отчет - Система анализа заболеваний РК</title>
+    <style>
+        body {
+            font-family: 'Courier New', monospace;
+            line-height: 1.6;
+            margin: 0;
+            padding: 20px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            min-height: 100vh;
+        }
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background: white;
+            padding: 30px;
+            border-radius: 15px;
+            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
+        }
+        .header {
+            text-align: center;
+            border-bottom: 3px solid #3498db;
+            padding-bottom: 20px;
+            margin-bottom: 30px;
+        }
+        .header h1 {
+            color: #2c3e50;
+            margin: 0;
+            font-size: 24px;
+        }
+        .header .subtitle {
+            color: #7f8c8d;
+            margin-top: 10px;
+        }
+        pre {
+            background-color: #f8f9fa;
+            padding: 20px;
+            border-radius: 8px;
+            border-left: 4px solid #3498db;
+            white-space: pre-wrap;
+            font-family: 'Courier New', monospace;
+            overflow-x: auto;
+            font-size: 12px;
+            line-height: 1.4;
+        }
+        .footer {
+            text-align: center;
+            margin-top: 30px;
+            padding-top: 20px;
+            border-top: 1px solid #ecf0f1;
+            font-size: 12px;
+            color: #7f8c8d;
+        }
+        @media print {
+            body { background: white; }
+            .container { box-shadow: none; }
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>📊 Отчет системы анализа заболеваний</h1>
+            <div class="subtitle">Республика Казахстан • Министерство здравоохранения</div>
+            <div class="subtitle">Создано: $created</div>
+        </div>
+        
+        <pre>$content</pre>
+        
+        <div class="footer">
+            <p><strong>Система анализа заболеваний населения РК</strong></p>
+            <p><em>Данный отчет сформирован автоматически и требует профессиональной интерпретации</em></p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
 
 class MedicalAnalysisSystem:
     def __init__(self, root):
@@ -70,7 +442,35 @@ class MedicalAnalysisSystem:
         self.current_data = None
         self.processed_data = None
         self.forecast_results = None
-        
+
+        # Кеши, зависящие от current_data (сбрасываются при загрузке данных)
+        self._years_cache = None
+        self._period_masks = {}
+        self._analysis_filter_cache = {}
+        self._forecast_cache = {}
+        # Кеши, которые заполняются и из фоновых потоков (см. _data_snapshot)
+        self._data_cache = {}
+
+        # Постоянная фигура 2×2 для графиков анализа (создается при первом анализе)
+        self._analysis_fig = None
+        self._analysis_axes = None
+        self._analysis_specs = None
+        self._analysis_canvas = None
+
+        # Фоновый поток для обучения моделей прогноза (интерфейс не блокируется)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._forecast_busy = False
+        # Отдельный поток для отчетов: их сборка не ждет окончания долгого прогноза
+        self._report_executor = ThreadPoolExecutor(max_workers=1)
+        # Текст последнего отчета (экспорт без чтения обратно из виджета Tk)
+        self._last_report = None
+        # Постоянный холст прогноза: новые фигуры подставляются без пересоздания виджета
+        self._forecast_canvas = None
+
+        # Границы и подписи возрастных групп
+        self._age_bins = np.array([0, 14, 30, 45, 60, 100])
+        self._age_labels = ['0-14', '15-30', '31-45', '46-60', '60+']
+
         # Создание базы данных
         self.init_database()
         
@@ -249,14 +649,16 @@ class MedicalAnalysisSystem:
             df = df.rename(columns={'Unnamed: 0': 'region'})
             months = ['январь', 'февраль', 'март', 'апрель', 'май', 'июнь',
                       'июль', 'август', 'сентябрь', 'октябрь', 'ноябрь', 'декабрь']
-            records = []
-            for _, row in df.iterrows():
-                region = str(row['region']).strip()
-                for m_idx, month_name in enumerate(months, start=1):
-                    val = row.get(month_name)
-                    if pd.isna(val):
-                        continue
-                    records.append((region, 2024, m_idx, int(val)))
+            # Пары (регион, месяц) с заполненными значениями одним проходом по таблице,
+            # в том же порядке: по строкам, внутри строки - по месяцам
+            month_cols = [name for name in months if name in df.columns]
+            month_nums = np.array([months.index(name) + 1 for name in month_cols], dtype=np.int64)
+            values = df[month_cols]
+            rows, cols = np.nonzero(values.notna().to_numpy())
+            regions = df['region'].astype(str).str.strip().to_numpy()
+            migrants = values.to_numpy(dtype=object)[rows, cols].astype(np.float64).astype(np.int64)
+            records = list(zip(regions[rows].tolist(), [2024] * len(rows),
+                               month_nums[cols].tolist(), migrants.tolist()))
             cursor.executemany(
                 "INSERT INTO demographics(region, year, month, migrants) VALUES (?, ?, ?, ?)",
                 records,
@@ -302,6 +704,12 @@ class MedicalAnalysisSystem:
             row['name']: {'lat': row['latitude'], 'lon': row['longitude']}
             for _, row in df.iterrows()
         }
+
+        # Отсортированный индекс регионов и массивы координат для поиска через searchsorted
+        df = df.drop_duplicates('name').sort_values('name')
+        self._region_index = df['name'].to_numpy()
+        self._region_lons = df['longitude'].to_numpy(dtype=float)
+        self._region_lats = df['latitude'].to_numpy(dtype=float)
         
     def create_menu(self):
         """Создание главного меню"""
@@ -327,12 +735,16 @@ class MedicalAnalysisSystem:
         # Меню Прогноз
         forecast_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Прогноз", menu=forecast_menu)
-        forecast_menu.add_command(label="Прогноз SARIMA", command=self.forecast_sarima)
+        forecast_menu.add_command(label="Прогноз SARIMA",
+                                  command=functools.partial(self.forecast_with_model, "SARIMA"))
         if SKLEARN_AVAILABLE:
-            forecast_menu.add_command(label="Прогноз ML (Random Forest)", command=self.forecast_ml)
-            forecast_menu.add_command(label="Линейная регрессия", command=self.forecast_linear_regression)
+            forecast_menu.add_command(label="Прогноз ML (Gradient Boosting)",
+                                      command=functools.partial(self.forecast_with_model, "Gradient Boosting"))
+            forecast_menu.add_command(label="Линейная регрессия",
+                                      command=functools.partial(self.forecast_with_model, "Linear Regression"))
         if XGBOOST_AVAILABLE:
-            forecast_menu.add_command(label="Прогноз XGBoost", command=self.forecast_xgboost)
+            forecast_menu.add_command(label="Прогноз XGBoost",
+                                      command=functools.partial(self.forecast_with_model, "XGBoost"))
         
     def create_toolbar(self):
         """Создание панели инструментов"""
@@ -579,13 +991,18 @@ class MedicalAnalysisSystem:
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка при сбросе фильтров: {str(e)}")
     
+    def _data_for_export(self):
+        """Отфильтрованные (или все) данные для записи в файл без служебной колонки 'Дата_dt'"""
+        data = self.processed_data if self.processed_data is not None else self.current_data
+        return _user_columns(data)
+
     def export_filtered_data(self):
         """Экспорт отфильтрованных данных"""
         if self.current_data is None:
             messagebox.showwarning("Предупреждение", "Нет данных для экспорта!")
             return
         
-        data_to_export = self.processed_data if self.processed_data is not None else self.current_data
+        data_to_export = self._data_for_export()
         
         filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
@@ -711,8 +1128,7 @@ class MedicalAnalysisSystem:
             # Обновляем список периодов на основе реальных данных
             if 'Дата' in self.current_data.columns:
                 try:
-                    dates = pd.to_datetime(self.current_data['Дата'], errors='coerce')
-                    years = sorted(dates.dt.year.dropna().unique(), reverse=True)
+                    years = sorted(self._get_years().dropna().unique(), reverse=True)
                     year_list = [str(int(year)) for year in years] + ['Все годы']
                     self.period_combo['values'] = year_list
                     
@@ -842,7 +1258,7 @@ class MedicalAnalysisSystem:
 
             # Преобразуем часть данных в текст
             try:
-                sample = self.current_data.head(50).to_markdown(index=False)
+                sample = _user_columns(self.current_data.head(50)).to_markdown(index=False)
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Ошибка преобразования данных: {str(e)}")
                 return
@@ -962,10 +1378,10 @@ class MedicalAnalysisSystem:
         
         if status['sklearn']:
             status_text += "✅ Linear Regression\n"
-            status_text += "✅ Random Forest\n"
+            status_text += "✅ Gradient Boosting\n"
         else:
             status_text += "❌ Linear Regression (нужен scikit-learn)\n"
-            status_text += "❌ Random Forest (нужен scikit-learn)\n"
+            status_text += "❌ Gradient Boosting (нужен scikit-learn)\n"
         
         if status['xgboost']:
             status_text += "✅ XGBoost\n"
@@ -1047,7 +1463,7 @@ class MedicalAnalysisSystem:
     4️⃣  Перезапустите программу
 
     🔄 Альтернативные варианты:
-    • Используйте Random Forest вместо XGBoost
+    • Используйте Gradient Boosting вместо XGBoost
     • Все остальные функции работают без XGBoost
     """
         
@@ -1056,7 +1472,7 @@ class MedicalAnalysisSystem:
     💡 РЕКОМЕНДАЦИИ:
     • SARIMA: Всегда доступна
     • Linear Regression: {'✅' if globals().get('SKLEARN_AVAILABLE', False) else '❌'}
-    • Random Forest: {'✅' if globals().get('SKLEARN_AVAILABLE', False) else '❌'}
+    • Gradient Boosting: {'✅' if globals().get('SKLEARN_AVAILABLE', False) else '❌'}
     • XGBoost: {'✅' if globals().get('XGBOOST_AVAILABLE', False) else '❌'}
 
     ⚠️  ВАЖНО: Программа полностью функциональна без XGBoost!
@@ -1075,7 +1491,7 @@ class MedicalAnalysisSystem:
         
         self.model_var = tk.StringVar(value="SARIMA")
         model_combo = ttk.Combobox(forecast_panel, textvariable=self.model_var, width=15, state="readonly")
-        available_models = ['SARIMA', 'Linear Regression', 'Random Forest', 'XGBoost']
+        available_models = ['SARIMA', 'Linear Regression', 'Gradient Boosting', 'XGBoost']
         model_combo['values'] = available_models
         model_combo.grid(row=0, column=1, padx=5, pady=5, sticky='w')
         
@@ -1117,7 +1533,7 @@ class MedicalAnalysisSystem:
                                 "📊 Доступные алгоритмы:\n"
                                 "• SARIMA: Временные ряды с сезонностью и трендом\n"
                                 "• Linear Regression: Линейная регрессия с сезонными факторами\n" 
-                                "• Random Forest: Ансамбль деревьев решений\n"
+                                "• Gradient Boosting: Градиентный бустинг на гистограммах признаков\n"
                                 "• XGBoost: Градиентный бустинг высокой точности", 
                             font=('Arial', 12), justify='center', foreground='#2c3e50')
         info_label.pack(expand=True)
@@ -1244,7 +1660,12 @@ class MedicalAnalysisSystem:
                 if 'ID' not in self.current_data.columns:
                     self.current_data.reset_index(inplace=True)
                     self.current_data.rename(columns={'index': 'ID'}, inplace=True)
-                
+                if 'Дата' in self.current_data.columns:
+                    self._parse_dates()
+                self._downcast_numeric()
+                self._categorize_keys()
+                self._reset_data_cache()
+
                 # Валидация данных
                 is_valid, message = self.validate_data_format(self.current_data)
                 if not is_valid:
@@ -1272,10 +1693,9 @@ class MedicalAnalysisSystem:
         if missing_columns:
             return False, f"Отсутствуют обязательные колонки: {', '.join(missing_columns)}"
         
-        # Проверка типов данных
-        try:
-            pd.to_datetime(data['Дата'])
-        except:
+        # Проверка типов данных (даты уже разобраны в 'Дата_dt' при загрузке)
+        parsed_dates = data['Дата_dt'] if 'Дата_dt' in data.columns else pd.to_datetime(data['Дата'], errors='coerce')
+        if (parsed_dates.isna() & data['Дата'].notna()).any():
             return False, "Неверный формат колонки 'Дата'. Ожидается формат даты."
         
         if not pd.api.types.is_numeric_dtype(data['Количество']):
@@ -1300,6 +1720,10 @@ class MedicalAnalysisSystem:
         finally:
             conn.close()
 
+        self._parse_dates()
+        self._downcast_numeric()
+        self._categorize_keys()
+        self._reset_data_cache()
         self.load_regions_from_db()
 
         if not self.current_data.empty:
@@ -1308,6 +1732,170 @@ class MedicalAnalysisSystem:
             self.update_map_filters()
             self.update_status(f"Загружено {len(self.current_data)} записей из базы данных")
 
+    def _parse_dates(self):
+        """Разбор колонки 'Дата' один раз на загрузку в служебную колонку 'Дата_dt'"""
+        dates = self.current_data['Дата']
+        try:
+            parsed = pd.to_datetime(dates, format='%Y-%m-%d', cache=True)
+        except (ValueError, TypeError):
+            parsed = pd.to_datetime(dates, errors='coerce', cache=True)
+        self.current_data['Дата_dt'] = parsed
+
+    def _downcast_numeric(self):
+        """Сужение числовых колонок до int32/float32 (вдвое меньше памяти при сканировании)"""
+        int32_info = np.iinfo(np.int32)
+        for col in ('ID', 'Количество', 'Возраст'):
+            if col not in self.current_data.columns:
+                continue
+            values = self.current_data[col]
+            if pd.api.types.is_integer_dtype(values):
+                if len(values) == 0 or (values.min() >= int32_info.min and values.max() <= int32_info.max):
+                    self.current_data[col] = values.astype(np.int32)
+            elif pd.api.types.is_float_dtype(values):
+                self.current_data[col] = values.astype(np.float32)
+
+    def _categorize_keys(self):
+        """Категориальный тип для ключей группировки (коды вместо хеширования строк)"""
+        for col in ('Регион', 'Заболевание', 'Пол'):
+            if col in self.current_data.columns:
+                values = self.current_data[col]
+                if pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+                    self.current_data[col] = values.astype('category')
+
+    def _reset_data_cache(self):
+        """Сброс кешей, построенных по current_data"""
+        self._years_cache = None
+        self._period_masks = {}
+        self._analysis_filter_cache = {}
+        self._forecast_cache = {}
+        self._data_cache = {}
+
+    def _get_years(self):
+        """Год каждой записи current_data (даты разбираются один раз на загрузку)"""
+        if self._years_cache is None:
+            self._years_cache = self.current_data['Дата_dt'].dt.year
+        return self._years_cache
+
+    def _get_region_totals(self):
+        """Число случаев по регионам current_data (общее для сводки и отчетов, кешируется)"""
+        data, cache = self._data_snapshot()
+        totals = cache.get('region_totals')
+        if totals is None:
+            totals = data.groupby('Регион', observed=True)['Количество'].sum()
+            self._store_cached(data, cache, 'region_totals', totals)
+        return totals
+
+    def _get_grand_total(self):
+        """Общее число случаев в current_data (кешируется)"""
+        data, cache = self._data_snapshot()
+        total = cache.get('grand_total')
+        if total is None:
+            total = data['Количество'].sum()
+            self._store_cached(data, cache, 'grand_total', total)
+        return total
+
+    def _get_age_groups(self):
+        """Возрастная группа каждой записи current_data (pd.cut один раз на набор данных)"""
+        data, cache = self._data_snapshot()
+        groups = cache.get('age_groups')
+        if groups is None:
+            groups = pd.cut(data['Возраст'], bins=self._age_bins, labels=self._age_labels)
+            self._store_cached(data, cache, 'age_groups', groups)
+        return groups
+
+    def _data_snapshot(self):
+        """Текущий набор данных и словарь его кешей для фонового вычисления
+
+        Данные читаются раньше словаря: при перезагрузке между чтениями проверка в
+        _store_cached не пропустит запись результата по старым данным в новый словарь.
+        """
+        data = self.current_data
+        return data, self._data_cache
+
+    def _store_cached(self, data, cache, key, value):
+        """Запись в кеш снимка, только если данные не перезагрузили за время вычисления"""
+        if self.current_data is data:
+            cache[key] = value
+        return value
+
+    def _get_sorted_by_date(self, snapshot=None):
+        """current_data без записей с некорректной датой, отсортированные по дате (кешируется)"""
+        data, cache = snapshot or self._data_snapshot()
+        sorted_data = cache.get('sorted_by_date')
+        if sorted_data is None:
+            sorted_data = data.dropna(subset=['Дата_dt']).sort_values('Дата_dt', kind='mergesort')
+            self._store_cached(data, cache, 'sorted_by_date', sorted_data)
+        return sorted_data
+
+    def _prepare_monthly(self, region_filter=None, disease_filter=None):
+        """Помесячные суммы и число записей для прогнозов (кешируется по фильтрам)
+
+        Индекс - начало месяца 'Дата' без пропусков между месяцами; месяцы без записей
+        имеют 'Записей' = 0.
+        """
+        # Снимок данных и кешей: вызывается из потока прогноза, данные могут перезагрузить
+        snapshot = self._data_snapshot()
+        data = self._get_sorted_by_date(snapshot)
+        # 'Все', пустое значение и None - один и тот же ряд: модели делят одну запись кеша
+        if not region_filter or region_filter == 'Все' or 'Регион' not in data.columns:
+            region_filter = None
+        if not disease_filter or disease_filter == 'Все' or 'Заболевание' not in data.columns:
+            disease_filter = None
+        key = ('monthly', region_filter, disease_filter)
+        monthly = snapshot[1].get(key)
+        if monthly is None:
+            if region_filter is not None:
+                data = data[data['Регион'] == region_filter]
+            if disease_filter is not None:
+                data = data[data['Заболевание'] == disease_filter]
+            # Целочисленный ключ месяца (месяцы с 1970-01) и bincount вместо группировки по Timestamp
+            month_keys = data['Дата_dt'].to_numpy().astype('datetime64[M]').astype(np.int64)
+            if len(month_keys):
+                first = month_keys.min()
+                offsets = month_keys - first
+                quantity = data['Количество']
+                weights = quantity.to_numpy(dtype=np.float64, na_value=0.0)
+                sums = np.bincount(offsets, weights=weights)
+                if pd.api.types.is_integer_dtype(quantity.dtype):
+                    sums = sums.astype(np.int64)
+                counts = np.bincount(offsets)
+                months = np.arange(first, first + len(counts)).astype('datetime64[M]')
+            else:
+                sums = np.empty(0)
+                counts = np.empty(0, dtype=np.int64)
+                months = np.empty(0, dtype='datetime64[M]')
+            index = pd.DatetimeIndex(months.astype('datetime64[ns]'), name='Дата', freq='MS')
+            monthly = pd.DataFrame({'Количество': sums, 'Записей': counts}, index=index)
+            self._store_cached(*snapshot, key, monthly)
+        return monthly
+
+    def _period_mask(self, period):
+        """Булева маска записей current_data за выбранный год"""
+        year = int(period)
+        mask = self._period_masks.get(year)
+        if mask is None:
+            mask = self._get_years().to_numpy() == year
+            self._period_masks[year] = mask
+        return mask
+
+    def _regional_growth_rate(self, data):
+        """Темп роста (%) по регионам между двумя последними годами в data.
+
+        Возвращает None, если в данных меньше двух лет.
+        """
+        years = self._get_years().loc[data.index].to_numpy(dtype=float)
+        valid = ~np.isnan(years)
+        years = years[valid]
+        year_values = np.unique(years)
+        if year_values.size < 2:
+            return None
+
+        region_codes, regions = pd.factorize(data['Регион'].to_numpy()[valid], sort=True)
+        values = np.nan_to_num(data['Количество'].to_numpy(dtype=float)[valid])
+        growth = _growth_rate(region_codes, years, values, len(regions),
+                              year_values[-1], year_values[-2])
+        return pd.Series(growth, index=regions)
+
     def apply_filters(self):
         """Применение фильтров к данным"""
         if self.current_data is None:
@@ -1315,7 +1903,8 @@ class MedicalAnalysisSystem:
             return
             
         try:
-            filtered_data = self.current_data.copy()
+            # Фильтры возвращают новые объекты; исходный набор не изменяется
+            filtered_data = self.current_data
             
             # Фильтр по региону
             region_filter = self.region_var.get()
@@ -1329,7 +1918,7 @@ class MedicalAnalysisSystem:
             if date_from:
                 try:
                     date_from_parsed = pd.to_datetime(date_from)
-                    filtered_data = filtered_data[pd.to_datetime(filtered_data['Дата']) >= date_from_parsed]
+                    filtered_data = filtered_data[filtered_data['Дата_dt'] >= date_from_parsed]
                 except Exception as e:
                     messagebox.showwarning("Предупреждение", 
                                          f"Неверный формат даты 'от': {date_from}. Используйте YYYY-MM-DD")
@@ -1338,7 +1927,7 @@ class MedicalAnalysisSystem:
             if date_to:
                 try:
                     date_to_parsed = pd.to_datetime(date_to)
-                    filtered_data = filtered_data[pd.to_datetime(filtered_data['Дата']) <= date_to_parsed]
+                    filtered_data = filtered_data[filtered_data['Дата_dt'] <= date_to_parsed]
                 except Exception as e:
                     messagebox.showwarning("Предупреждение", 
                                          f"Неверный формат даты 'до': {date_to}. Используйте YYYY-MM-DD")
@@ -1472,10 +2061,11 @@ class MedicalAnalysisSystem:
                 
                 # Основная статистика
                 total_records = len(self.current_data)
+                user_data = _user_columns(self.current_data)
                 
                 # Период данных
                 try:
-                    dates = pd.to_datetime(self.current_data['Дата'])
+                    dates = self.current_data['Дата_dt']
                     date_min = dates.min().strftime('%Y-%m-%d')
                     date_max = dates.max().strftime('%Y-%m-%d')
                 except:
@@ -1484,7 +2074,7 @@ class MedicalAnalysisSystem:
                 # Уникальные значения
                 unique_regions = self.current_data['Регион'].nunique() if 'Регион' in self.current_data.columns else 0
                 unique_diseases = self.current_data['Заболевание'].nunique() if 'Заболевание' in self.current_data.columns else 0
-                total_cases = self.current_data['Количество'].sum() if 'Количество' in self.current_data.columns else 0
+                total_cases = self._get_grand_total() if 'Количество' in self.current_data.columns else 0
                 
                 stats_text = f"""ОБЩАЯ СТАТИСТИКА ДАННЫХ
 ═══════════════════════════════════
@@ -1497,13 +2087,13 @@ class MedicalAnalysisSystem:
 • Общее количество случаев: {total_cases:,}
 
 📈 Структура данных:
-• Колонок: {len(self.current_data.columns)}
-• Размер данных: {self.current_data.memory_usage(deep=True).sum() / 1024 / 1024:.1f} МБ"""
+• Колонок: {len(user_data.columns)}
+• Размер данных: {user_data.memory_usage(deep=True).sum() / 1024 / 1024:.1f} МБ"""
 
                 # Добавляем топ регионы если есть данные
                 if 'Регион' in self.current_data.columns and 'Количество' in self.current_data.columns:
                     try:
-                        top_regions = self.current_data.groupby('Регион')['Количество'].sum().sort_values(ascending=False).head(3)
+                        top_regions = self._get_region_totals().nlargest(3)
                         stats_text += f"\n\n🏆 ТОП-3 РЕГИОНА:"
                         for i, (region, count) in enumerate(top_regions.items(), 1):
                             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
@@ -1540,7 +2130,7 @@ class MedicalAnalysisSystem:
                 
                 # Даты
                 try:
-                    dates = pd.to_datetime(filtered_data['Дата'])
+                    dates = filtered_data['Дата_dt']
                     date_min = dates.min().strftime('%Y-%m-%d') if not dates.isna().all() else 'Не определено'
                     date_max = dates.max().strftime('%Y-%m-%d') if not dates.isna().all() else 'Не определено'
                 except:
@@ -1568,7 +2158,7 @@ class MedicalAnalysisSystem:
                 # Топ регионы
                 if 'Регион' in filtered_data.columns and 'Количество' in filtered_data.columns:
                     try:
-                        top_regions = filtered_data.groupby('Регион')['Количество'].sum().sort_values(ascending=False).head(3)
+                        top_regions = filtered_data.groupby('Регион', observed=True)['Количество'].sum().nlargest(3)
                         for i, (region, count) in enumerate(top_regions.items(), 1):
                             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉"
                             stats_text += f"\n{medal} {region}: {count:,}"
@@ -1579,7 +2169,7 @@ class MedicalAnalysisSystem:
                 if 'Заболевание' in filtered_data.columns:
                     try:
                         stats_text += f"\n\n💊 ТОП-3 ЗАБОЛЕВАНИЯ:"
-                        top_diseases = filtered_data.groupby('Заболевание')['Количество'].sum().sort_values(ascending=False).head(3)
+                        top_diseases = filtered_data.groupby('Заболевание', observed=True)['Количество'].sum().nlargest(3)
                         for i, (disease, count) in enumerate(top_diseases.items(), 1):
                             medal = "🔴" if i == 1 else "🟡" if i == 2 else "🟢"
                             stats_text += f"\n{medal} {disease}: {count:,}"
@@ -1602,26 +2192,55 @@ class MedicalAnalysisSystem:
         if self.current_data is None:
             return pd.DataFrame()
 
-        data = self.current_data.copy()
+        # Ключ кеша - состояние фильтров анализа
+        disease_filter = self.disease_var.get()
+        region_filter = self.analysis_region_var.get() if hasattr(self, 'analysis_region_var') else None
+        date_from = date_to = None
+        if hasattr(self, 'analysis_date_from') and hasattr(self, 'analysis_date_to'):
+            date_from = self.analysis_date_from.get().strip()
+            date_to = self.analysis_date_to.get().strip()
+        filter_key = (disease_filter, region_filter, date_from, date_to)
+
+        # В кеше - данные вместе с уведомлением: оно показывается при каждом вызове
+        cached = self._analysis_filter_cache.get(filter_key)
+        if cached is None:
+            data, notice = self._filter_analysis_data(*filter_key)
+            if data is None:
+                messagebox.showwarning("Предупреждение", notice)
+                return pd.DataFrame()
+            cached = (data, notice)
+            if len(self._analysis_filter_cache) >= 8:
+                self._analysis_filter_cache.pop(next(iter(self._analysis_filter_cache)))
+            self._analysis_filter_cache[filter_key] = cached
+
+        data, notice = cached
+        if notice:
+            messagebox.showinfo("Информация", notice)
+
+        # Поверхностная копия: новые колонки анализаторов не попадают в кеш
+        return data.copy(deep=False)
+
+    def _filter_analysis_data(self, disease_filter, region_filter, date_from, date_to):
+        """Фильтрация current_data для анализа без обращений к интерфейсу
+
+        Возвращает (данные, текст уведомления или None); при неверном формате даты -
+        (None, текст предупреждения).
+        """
+        data = self.current_data
 
         # Фильтр по заболеванию
-        disease_filter = self.disease_var.get()
         if disease_filter and disease_filter != 'Все' and 'Заболевание' in data.columns:
             data = data[data['Заболевание'] == disease_filter]
 
         # Фильтр по региону
-        if hasattr(self, 'analysis_region_var') and 'Регион' in data.columns:
-            region_filter = self.analysis_region_var.get()
+        if region_filter is not None and 'Регион' in data.columns:
             if region_filter and region_filter != 'Все':
                 data = data[data['Регион'] == region_filter]
 
         # Фильтр по дате
-        if hasattr(self, 'analysis_date_from') and hasattr(self, 'analysis_date_to'):
-            date_from = self.analysis_date_from.get().strip()
-            date_to = self.analysis_date_to.get().strip()
-
-            available_min = pd.to_datetime(data['Дата']).min()
-            available_max = pd.to_datetime(data['Дата']).max()
+        if date_from is not None and date_to is not None:
+            available_min = data['Дата_dt'].min()
+            available_max = data['Дата_dt'].max()
 
             msg_parts = []
 
@@ -1633,29 +2252,23 @@ class MedicalAnalysisSystem:
                             f"Начальные данные доступны только с {available_min.date()}"
                         )
                         date_from_parsed = available_min
-                    data = data[pd.to_datetime(data['Дата']) >= date_from_parsed]
+                    data = data[data['Дата_dt'] >= date_from_parsed]
                 except Exception:
-                    messagebox.showwarning(
-                        "Предупреждение",
-                        f"Неверный формат даты 'с': {date_from}. Используйте YYYY-MM-DD")
-                    return pd.DataFrame()
+                    return None, f"Неверный формат даты 'с': {date_from}. Используйте YYYY-MM-DD"
 
             if date_to:
                 try:
                     date_to_parsed = pd.to_datetime(date_to)
                     if date_to_parsed > available_max:
                         date_to_parsed = available_max
-                    data = data[pd.to_datetime(data['Дата']) <= date_to_parsed]
+                    data = data[data['Дата_dt'] <= date_to_parsed]
                 except Exception:
-                    messagebox.showwarning(
-                        "Предупреждение",
-                        f"Неверный формат даты 'по': {date_to}. Используйте YYYY-MM-DD")
-                    return pd.DataFrame()
+                    return None, f"Неверный формат даты 'по': {date_to}. Используйте YYYY-MM-DD"
 
             if msg_parts:
-                messagebox.showinfo("Информация", "\n".join(msg_parts))
+                return data, "\n".join(msg_parts)
 
-        return data
+        return data, None
 
     def build_map(self):
         """Построение карты заболеваемости"""
@@ -1685,8 +2298,14 @@ class MedicalAnalysisSystem:
             period = self.map_period.get()
             metric = self.map_metric.get()
             disease_filter = self.map_disease.get()
-            
-            data = self.current_data.copy()
+
+            # Фильтр по периоду (маска по всему набору, до остальных фильтров)
+            data = self.current_data
+            if period != 'Все годы' and period != '':
+                try:
+                    data = data[self._period_mask(period)]
+                except ValueError:
+                    pass
             region_filter_var = getattr(self, 'forecast_region_var', None)
             region_filter = region_filter_var.get() if hasattr(region_filter_var, 'get') else region_filter_var
             if region_filter and region_filter != 'Все' and 'Регион' in data.columns:
@@ -1703,22 +2322,14 @@ class MedicalAnalysisSystem:
             # Фильтр по заболеванию
             if disease_filter != 'Все' and 'Заболевание' in data.columns:
                 data = data[data['Заболевание'] == disease_filter]
-            
-            # Фильтр по периоду
-            if period != 'Все годы' and period != '':
-                try:
-                    data['Год'] = pd.to_datetime(data['Дата']).dt.year
-                    data = data[data['Год'] == int(period)]
-                except:
-                    pass
-            
+
             if len(data) == 0:
                 messagebox.showwarning("Предупреждение", "Нет данных для выбранных фильтров")
                 return
             
             # Агрегация по регионам в зависимости от выбранного показателя
             if metric == 'Всего случаев':
-                regional_data = data.groupby('Регион')['Количество'].sum().sort_values(ascending=False)
+                regional_data = data.groupby('Регион', observed=True)['Количество'].sum().sort_values(ascending=False)
                 title_suffix = "Общее количество случаев"
                 color_label = "Количество случаев"
             elif metric == 'На 100К населения':
@@ -1729,59 +2340,65 @@ class MedicalAnalysisSystem:
                     'Костанай': 250, 'Атырау': 300, 'Петропавловск': 200, 'Актау': 200,
                     'Кокшетау': 150, 'Семей': 350, 'Талдыкорган': 200
                 }
-                regional_totals = data.groupby('Регион')['Количество'].sum()
+                regional_totals = data.groupby('Регион', observed=True)['Количество'].sum()
                 regional_data = pd.Series({region: (count / population_data.get(region, 500)) * 100 
                                          for region, count in regional_totals.items()}).sort_values(ascending=False)
                 title_suffix = "На 100К населения"
                 color_label = "Случаев на 100К"
             elif metric == 'Темп роста':
                 # Расчет темпа роста за последние 2 года
-                data['Год'] = pd.to_datetime(data['Дата']).dt.year
-                yearly_data = data.groupby(['Регион', 'Год'])['Количество'].sum().unstack(fill_value=0)
-                if yearly_data.shape[1] >= 2:
-                    last_year = yearly_data.columns[-1]
-                    prev_year = yearly_data.columns[-2]
-                    regional_data = ((yearly_data[last_year] - yearly_data[prev_year]) / 
-                                   yearly_data[prev_year].replace(0, 1) * 100).sort_values(ascending=False)
+                growth = self._regional_growth_rate(data)
+                if growth is not None:
+                    regional_data = growth.sort_values(ascending=False)
                     title_suffix = "Темп роста (%)"
                     color_label = "Темп роста (%)"
                 else:
-                    regional_data = data.groupby('Регион')['Количество'].sum().sort_values(ascending=False)
+                    regional_data = data.groupby('Регион', observed=True)['Количество'].sum().sort_values(ascending=False)
                     title_suffix = "Данных недостаточно для темпа роста"
                     color_label = "Количество случаев"
             else:
-                regional_data = data.groupby('Регион')['Количество'].mean().sort_values(ascending=False)
+                regional_data = data.groupby('Регион', observed=True)['Количество'].mean().sort_values(ascending=False)
                 title_suffix = "Средняя тяжесть"
                 color_label = "Среднее значение"
             
             # Создание графика
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 8))
+            fig = Figure(figsize=(12, 8))
+            ax1, ax2 = fig.subplots(1, 2)
+
+            # NumPy-массивы передаем в matplotlib напрямую, без обращений к Series
+            idx = regional_data.index.to_numpy()
+            vals = regional_data.to_numpy(dtype=float)
+            n_regions = vals.size
+            positions = np.arange(n_regions)
             
             # График 1: Столбчатая диаграмма
-            colors = plt.cm.Reds(np.linspace(0.3, 1, len(regional_data)))
-            bars = ax1.bar(range(len(regional_data)), regional_data.values, color=colors)
-            ax1.set_xticks(range(len(regional_data)))
-            ax1.set_xticklabels(regional_data.index, rotation=45, ha='right')
+            colors = _palette('Reds', 0.3, 1, n_regions)
+            bars = ax1.bar(positions, vals, color=colors)
+            ax1.set_xticks(positions)
+            ax1.set_xticklabels(idx, rotation=45, ha='right')
             ax1.set_ylabel(color_label)
             ax1.set_title(f'{title_suffix} по регионам\n({period}, {disease_filter})')
             ax1.grid(True, axis='y', alpha=0.3)
             
             # Добавление значений на столбцы
-            for i, (bar, value) in enumerate(zip(bars, regional_data.values)):
+            for bar, value in zip(bars, vals):
                 ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + value*0.01,
                         f'{value:,.1f}', ha='center', va='bottom', fontsize=9, rotation=0)
             
             # График 2: Круговая диаграмма топ-8 регионов
-            top_regions = regional_data.head(8)
-            others = regional_data[8:].sum() if len(regional_data) > 8 else 0
+            top_vals = vals[:8]
+            top_labels = idx[:8]
+            others = np.nansum(vals[8:]) if n_regions > 8 else 0
             
             if others > 0:
-                plot_data = pd.concat([top_regions, pd.Series([others], index=['Другие'])])
+                pie_vals = np.append(top_vals, others)
+                pie_labels = np.append(top_labels, 'Другие')
             else:
-                plot_data = top_regions
+                pie_vals = top_vals
+                pie_labels = top_labels
             
-            if len(plot_data) > 0:
-                wedges, texts, autotexts = ax2.pie(plot_data.values, labels=plot_data.index, 
+            if pie_vals.size > 0:
+                wedges, texts, autotexts = ax2.pie(pie_vals, labels=pie_labels, 
                                                   autopct='%1.1f%%', startangle=90)
                 ax2.set_title(f'Распределение по регионам\n({metric}, {period})')
                 
@@ -1794,7 +2411,7 @@ class MedicalAnalysisSystem:
                 ax2.text(0.5, 0.5, 'Нет данных\nдля отображения', 
                         ha='center', va='center', transform=ax2.transAxes)
             
-            plt.tight_layout()
+            fig.tight_layout()
             
             # Встраивание графика
             canvas = FigureCanvasTkAgg(fig, master=self.map_plot_frame)
@@ -1802,27 +2419,27 @@ class MedicalAnalysisSystem:
             canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
             
             # Обновление статистики
-            if len(regional_data) > 0:
+            if n_regions > 0:
                 stats_text = f"""СТАТИСТИКА ПО КАРТЕ ({period})
 ══════════════════════════════════════
 Показатель: {metric}
 Заболевание: {disease_filter}
-Всего регионов: {len(regional_data)}
+Всего регионов: {n_regions}
 
 🏆 ТОП-3:
-🥇 {regional_data.index[0]}: {regional_data.iloc[0]:,.1f}"""
+🥇 {idx[0]}: {vals[0]:,.1f}"""
                 
-                if len(regional_data) > 1:
-                    stats_text += f"\n🥈 {regional_data.index[1]}: {regional_data.iloc[1]:,.1f}"
-                if len(regional_data) > 2:
-                    stats_text += f"\n🥉 {regional_data.index[2]}: {regional_data.iloc[2]:,.1f}"
+                if n_regions > 1:
+                    stats_text += f"\n🥈 {idx[1]}: {vals[1]:,.1f}"
+                if n_regions > 2:
+                    stats_text += f"\n🥉 {idx[2]}: {vals[2]:,.1f}"
                     
                 stats_text += f"""
 
 📊 Статистика:
-• Среднее: {regional_data.mean():,.1f}
-• Медиана: {regional_data.median():,.1f}
-• Макс/мин: {regional_data.max():,.1f} / {regional_data.min():,.1f}"""
+• Среднее: {_nanmean(vals):,.1f}
+• Медиана: {_nanmedian(vals):,.1f}
+• Макс/мин: {_nanmax(vals):,.1f} / {_nanmin(vals):,.1f}"""
             else:
                 stats_text = "Нет данных для отображения статистики"
             
@@ -1838,28 +2455,30 @@ class MedicalAnalysisSystem:
         """Построение временной карты"""
         try:
             # Создание временной карты
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 7))
+            fig = Figure(figsize=(14, 7))
+            ax1, ax2 = fig.subplots(1, 2)
             
             # Подготовка данных по годам
-            data = self.current_data.copy()
+            data = self.current_data
             disease_filter = self.map_disease.get()
             
             # Фильтр по заболеванию
             if disease_filter != 'Все' and 'Заболевание' in data.columns:
                 data = data[data['Заболевание'] == disease_filter]
             
-            data['Дата'] = pd.to_datetime(data['Дата'])
-            data['Год'] = data['Дата'].dt.year
-            data['Месяц'] = data['Дата'].dt.month
+            # Год и месяц - отдельные ключи группировки, без копии и новых столбцов в наборе
+            years_key = data['Дата_dt'].dt.year.rename('Год')
+            months_key = data['Дата_dt'].dt.month.rename('Месяц')
+            temporal_data = None
+            monthly_data = None
             
             # График 1: Тепловая карта год-регион
             try:
-                temporal_data = data.pivot_table(index='Год', columns='Регион', 
-                                            values='Количество', aggfunc='sum', fill_value=0)
+                temporal_data = data.groupby([years_key, data['Регион']], observed=True)['Количество'].sum().unstack(fill_value=0)
                 
                 if len(temporal_data.index) > 0 and len(temporal_data.columns) > 0:
                     # Берем топ-12 регионов для читаемости
-                    top_regions = temporal_data.sum(axis=0).sort_values(ascending=False).head(12).index
+                    top_regions = _top_k(temporal_data.sum(axis=0), 12).index
                     temporal_subset = temporal_data[top_regions]
                     
                     im1 = ax1.imshow(temporal_subset.values, cmap='YlOrRd', aspect='auto')
@@ -1871,16 +2490,10 @@ class MedicalAnalysisSystem:
                     ax1.set_ylabel('Год')
                     ax1.set_title(f'Временная динамика по регионам\n({disease_filter})')
                     
-                    plt.colorbar(im1, ax=ax1, label='Количество случаев')
+                    fig.colorbar(im1, ax=ax1, label='Количество случаев')
                     
                     # Добавляем значения на ячейки для лучшей читаемости
-                    for i in range(len(temporal_subset.index)):
-                        for j in range(len(temporal_subset.columns)):
-                            value = temporal_subset.iloc[i, j]
-                            if value > 0:
-                                text_color = 'white' if value > temporal_subset.values.max() * 0.5 else 'black'
-                                ax1.text(j, i, f'{int(value)}', ha='center', va='center', 
-                                        color=text_color, fontsize=8, fontweight='bold')
+                    _annotate_counts(ax1, temporal_subset.to_numpy())
                 else:
                     ax1.text(0.5, 0.5, 'Недостаточно данных', ha='center', va='center', transform=ax1.transAxes)
                     ax1.set_title('Временная динамика по регионам (нет данных)')
@@ -1890,8 +2503,7 @@ class MedicalAnalysisSystem:
             
             # График 2: Тепловая карта месяц-год
             try:
-                monthly_data = data.pivot_table(index='Месяц', columns='Год', 
-                                              values='Количество', aggfunc='sum', fill_value=0)
+                monthly_data = data.groupby([months_key, years_key], observed=True)['Количество'].sum().unstack(fill_value=0)
                 
                 if len(monthly_data.index) > 0 and len(monthly_data.columns) > 0:
                     im2 = ax2.imshow(monthly_data.values, cmap='RdYlBu_r', aspect='auto')
@@ -1903,16 +2515,10 @@ class MedicalAnalysisSystem:
                     ax2.set_ylabel('Месяц')
                     ax2.set_title(f'Сезонная динамика по годам\n({disease_filter})')
                     
-                    plt.colorbar(im2, ax=ax2, label='Количество случаев')
+                    fig.colorbar(im2, ax=ax2, label='Количество случаев')
                     
                     # Добавляем значения на ячейки
-                    for i in range(len(monthly_data.index)):
-                        for j in range(len(monthly_data.columns)):
-                            value = monthly_data.iloc[i, j]
-                            if value > 0:
-                                text_color = 'white' if value > monthly_data.values.max() * 0.5 else 'black'
-                                ax2.text(j, i, f'{int(value)}', ha='center', va='center', 
-                                        color=text_color, fontsize=8, fontweight='bold')
+                    _annotate_counts(ax2, monthly_data.to_numpy())
                 else:
                     ax2.text(0.5, 0.5, 'Недостаточно данных', ha='center', va='center', transform=ax2.transAxes)
                     ax2.set_title('Сезонная динамика (нет данных)')
@@ -1920,16 +2526,24 @@ class MedicalAnalysisSystem:
                 ax2.text(0.5, 0.5, f'Ошибка: {str(e)[:50]}...', ha='center', va='center', transform=ax2.transAxes)
                 ax2.set_title('Ошибка сезонной динамики')
             
-            plt.tight_layout()
+            fig.tight_layout()
             
             # Встраивание графика
             canvas = FigureCanvasTkAgg(fig, master=self.map_plot_frame)
             canvas.draw()
             canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
             
-            # Статистика
-            years = sorted(data['Год'].unique()) if 'Год' in data.columns else []
+            # Статистика (размеры и суммы берем из уже построенных сводных таблиц)
             total_records = len(data)
+            if temporal_data is not None:
+                years = temporal_data.index.tolist()
+                total_cases = temporal_data.values.sum()
+                regions_count = temporal_data.columns.size
+            else:
+                years = sorted(years_key.dropna().unique())
+                total_cases = data['Количество'].sum()
+                regions_count = data['Регион'].nunique()
+            months_count = monthly_data.index.size if monthly_data is not None else months_key.nunique()
             
             stats_text = f"""ВРЕМЕННАЯ КАРТА
 ══════════════════════════════════════
@@ -1940,11 +2554,11 @@ class MedicalAnalysisSystem:
 
 📈 Динамика:
 • Среднее в год: {total_records / len(years) if years else 0:,.0f}
-• Всего случаев: {data['Количество'].sum() if 'Количество' in data.columns else 0:,}
+• Всего случаев: {total_cases:,}
 
 🗓️ Покрытие данных:
-• Месяцев с данными: {data['Месяц'].nunique() if 'Месяц' in data.columns else 0}
-• Регионов охвачено: {data['Регион'].nunique() if 'Регион' in data.columns else 0}"""
+• Месяцев с данными: {months_count}
+• Регионов охвачено: {regions_count}"""
             
             self.map_stats_text.delete(1.0, tk.END)
             self.map_stats_text.insert(1.0, stats_text)
@@ -1957,55 +2571,59 @@ class MedicalAnalysisSystem:
     def build_kz_cartogram(self):
         """Картограмма регионов Казахстана по выбранному показателю"""
         try:
-            fig, ax = plt.subplots(figsize=(12, 8))
+            fig = Figure(figsize=(12, 8))
+            ax = fig.subplots()
 
-            data = self.current_data.copy()
             metric = self.map_metric.get()
             period = self.map_period.get()
             disease_filter = self.map_disease.get()
 
+            data = self.current_data
+            if period != 'Все годы':
+                data = data[self._period_mask(period)]
+
             if disease_filter != 'Все' and 'Заболевание' in data.columns:
                 data = data[data['Заболевание'] == disease_filter]
 
-            if period != 'Все годы':
-                data['Год'] = pd.to_datetime(data['Дата']).dt.year
-                data = data[data['Год'] == int(period)]
-
             if len(data) == 0:
                 messagebox.showwarning("Предупреждение", "Нет данных для выбранных фильтров")
                 return
 
             if metric == 'Темп роста':
-                data['Год'] = pd.to_datetime(data['Дата']).dt.year
-                yearly = data.groupby(['Регион', 'Год'])['Количество'].sum().unstack(fill_value=0)
-                if yearly.shape[1] >= 2:
-                    last_year = yearly.columns[-1]
-                    prev_year = yearly.columns[-2]
-                    values = ((yearly[last_year] - yearly[prev_year]) / yearly[prev_year].replace(0, 1) * 100)
+                growth = self._regional_growth_rate(data)
+                if growth is not None:
+                    values = growth
                     color_label = 'Темп роста (%)'
                 else:
-                    values = data.groupby('Регион')['Количество'].sum()
+                    values = data.groupby('Регион', observed=True)['Количество'].sum()
                     color_label = 'Количество случаев'
             elif metric == 'Всего случаев':
-                values = data.groupby('Регион')['Количество'].sum()
+                values = data.groupby('Регион', observed=True)['Количество'].sum()
                 color_label = 'Количество случаев'
             else:
-                values = data.groupby('Регион')['Количество'].mean()
+                values = data.groupby('Регион', observed=True)['Количество'].mean()
                 color_label = metric
 
-            coords = getattr(self, 'region_coords', {})
-
-            lons = [coords[r]['lon'] for r in values.index if r in coords]
-            lats = [coords[r]['lat'] for r in values.index if r in coords]
-            vals = [values[r] for r in values.index if r in coords]
+            # Координаты регионов берем из предвычисленных массивов
+            region_index = getattr(self, '_region_index', np.array([], dtype=object))
+            names = values.index.to_numpy()
+            if region_index.size > 0:
+                pos = np.minimum(np.searchsorted(region_index, names), region_index.size - 1)
+                found = region_index[pos] == names
+            else:
+                pos = np.zeros(names.size, dtype=int)
+                found = np.zeros(names.size, dtype=bool)
+            pos = pos[found]
+            lons = self._region_lons[pos] if pos.size else np.array([])
+            lats = self._region_lats[pos] if pos.size else np.array([])
+            vals = values.to_numpy()[found]
 
             sc = ax.scatter(lons, lats, c=vals, cmap='coolwarm', s=300, edgecolors='black')
 
-            for region in values.index:
-                if region in coords:
-                    ax.text(coords[region]['lon'], coords[region]['lat'], region, ha='center', va='center', fontsize=8)
+            for region, lon, lat in zip(names[found], lons, lats):
+                ax.text(lon, lat, region, ha='center', va='center', fontsize=8)
 
-            plt.colorbar(sc, ax=ax, label=color_label)
+            fig.colorbar(sc, ax=ax, label=color_label)
             ax.set_title(f'{metric} по регионам Казахстана ({period})')
             ax.set_xlabel('Долгота')
             ax.set_ylabel('Широта')
@@ -2018,7 +2636,7 @@ class MedicalAnalysisSystem:
             canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
             self.map_stats_text.delete(1.0, tk.END)
-            self.map_stats_text.insert(1.0, f'Регионов: {len(values)}\nСреднее значение: {np.mean(vals):.1f}')
+            self.map_stats_text.insert(1.0, f'Регионов: {len(values)}\nСреднее значение: {_nanmean(vals):.1f}')
             self.update_status('Карта Казахстана построена')
 
         except Exception as e:
@@ -2033,9 +2651,13 @@ class MedicalAnalysisSystem:
         analysis_type = self.analysis_type.get()
         
         try:
-            # Очищаем предыдущие результаты
+            # Очищаем предыдущие результаты (постоянный холст анализа только скрываем)
+            persistent = self._analysis_canvas.get_tk_widget() if self._analysis_canvas is not None else None
             for widget in self.analysis_plot_frame.winfo_children():
-                widget.destroy()
+                if widget is persistent:
+                    widget.pack_forget()
+                else:
+                    widget.destroy()
             self.analysis_canvas = None
             
             if analysis_type == "seasonality":
@@ -2056,6 +2678,35 @@ class MedicalAnalysisSystem:
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка при выполнении анализа: {str(e)}")
 
+    def _get_analysis_axes(self):
+        """Оси постоянной фигуры 2×2 для анализа (очищаются при повторном использовании)"""
+        if self._analysis_fig is None:
+            fig = Figure(figsize=(12, 8))
+            axes = fig.subplots(2, 2)
+            self._analysis_fig = fig
+            self._analysis_axes = tuple(axes.flat)
+            self._analysis_specs = [ax.get_subplotspec() for ax in self._analysis_axes]
+        else:
+            # Удаляем цветовые шкалы прошлого анализа и возвращаем осям исходную сетку
+            for ax in list(self._analysis_fig.axes):
+                if ax not in self._analysis_axes:
+                    ax.remove()
+            for ax, spec in zip(self._analysis_axes, self._analysis_specs):
+                ax.clear()
+                ax.set_subplotspec(spec)
+                ax.set_aspect('auto')
+
+        if self._analysis_canvas is None:
+            self._analysis_canvas = FigureCanvasTkAgg(self._analysis_fig, master=self.analysis_plot_frame)
+        self._analysis_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.analysis_canvas = self._analysis_canvas
+        return self._analysis_fig, self._analysis_axes
+
+    def _draw_analysis(self):
+        """Компоновка и отложенная перерисовка постоянной фигуры анализа"""
+        self._analysis_fig.tight_layout()
+        self._analysis_canvas.draw_idle()
+
     def save_analysis_plot(self):
         """Сохранение текущего графика анализа"""
         try:
@@ -2118,28 +2769,32 @@ class MedicalAnalysisSystem:
     def analyze_seasonality(self):
         """Анализ сезонности заболеваний"""
         try:
-            # Создание фигуры с множественными графиками
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
-
             # Подготовка данных
             data = self.get_analysis_filtered_data()
             if data is None or len(data) == 0:
                 messagebox.showwarning("Предупреждение", "Нет данных для выбранных фильтров")
                 return
-            data['Дата'] = pd.to_datetime(data['Дата'])
+
+            # Постоянная фигура с множественными графиками
+            fig, (ax1, ax2, ax3, ax4) = self._get_analysis_axes()
+
+            data['Дата'] = data['Дата_dt']
             data['Месяц'] = data['Дата'].dt.month
             data['Год'] = data['Дата'].dt.year
-            data['Сезон'] = data['Месяц'].map({
-                12: 'Зима', 1: 'Зима', 2: 'Зима',
-                3: 'Весна', 4: 'Весна', 5: 'Весна',
-                6: 'Лето', 7: 'Лето', 8: 'Лето',
-                9: 'Осень', 10: 'Осень', 11: 'Осень'
-            })
+            
+            # Месяцы 1..12 и количества как массивы: суммы через bincount вместо groupby
+            month_values = data['Месяц'].to_numpy()
+            valid = ~np.isnan(month_values)
+            months = month_values[valid].astype(np.intp)
+            counts = np.nan_to_num(data['Количество'].to_numpy(dtype=float)[valid])
+            month_present = np.bincount(months, minlength=13)[1:13] > 0
+            monthly_sums = np.bincount(months, weights=counts, minlength=13)[1:13]
             
             # График 1: Общая сезонность по месяцам
-            monthly_data = data.groupby('Месяц')['Количество'].sum()
-            ax1.plot(monthly_data.index, monthly_data.values, marker='o', linewidth=3, markersize=8, color='#2E86AB')
-            ax1.fill_between(monthly_data.index, monthly_data.values, alpha=0.3, color='#2E86AB')
+            month_axis = np.arange(1, 13)[month_present]
+            monthly_values = monthly_sums[month_present]
+            ax1.plot(month_axis, monthly_values, marker='o', linewidth=3, markersize=8, color='#2E86AB')
+            ax1.fill_between(month_axis, monthly_values, alpha=0.3, color='#2E86AB')
             ax1.set_xlabel('Месяц')
             ax1.set_ylabel('Количество случаев')
             ax1.set_title('Общая сезонность заболеваемости', fontsize=14, fontweight='bold')
@@ -2148,12 +2803,13 @@ class MedicalAnalysisSystem:
             
             # График 2: Сезонность по заболеваниям (топ-5)
             if 'Заболевание' in data.columns:
-                diseases = data.groupby('Заболевание')['Количество'].sum().sort_values(ascending=False).head(5).index
-                colors = plt.cm.Set1(np.linspace(0, 1, len(diseases)))
+                # Одна группировка (заболевание, месяц) вместо фильтрации по каждому заболеванию
+                disease_monthly = data.groupby(['Заболевание', 'Месяц'], sort=False, observed=True)['Количество'].sum()
+                diseases = _top_k(disease_monthly.groupby(level=0, observed=True).sum(), 5).index
+                colors = _palette('Set1', 0, 1, len(diseases))
                 
                 for disease, color in zip(diseases, colors):
-                    disease_data = data[data['Заболевание'] == disease]
-                    monthly_disease = disease_data.groupby('Месяц')['Количество'].sum()
+                    monthly_disease = disease_monthly.loc[disease].sort_index()
                     ax2.plot(monthly_disease.index, monthly_disease.values, 
                             marker='o', label=disease, linewidth=2, color=color)
                 
@@ -2165,9 +2821,13 @@ class MedicalAnalysisSystem:
                 ax2.set_xticks(range(1, 13))
             
             # График 3: Распределение по сезонам
-            seasonal_data = data.groupby('Сезон')['Количество'].sum()
+            season_names = np.array(['Весна', 'Зима', 'Лето', 'Осень'])
+            month_to_season = np.array([0, 1, 1, 0, 0, 0, 2, 2, 2, 3, 3, 3, 1])  # индекс 0 не используется
+            season_codes = month_to_season[months]
+            season_present = np.bincount(season_codes, minlength=4) > 0
+            seasonal_sums = np.bincount(season_codes, weights=counts, minlength=4)
             colors = ['lightblue', 'lightgreen', 'orange', 'lightcoral']
-            wedges, texts, autotexts = ax3.pie(seasonal_data.values, labels=seasonal_data.index, 
+            wedges, texts, autotexts = ax3.pie(seasonal_sums[season_present], labels=season_names[season_present], 
                                               autopct='%1.1f%%', colors=colors, startangle=90)
             ax3.set_title('Распределение по сезонам', fontsize=14, fontweight='bold')
             
@@ -2180,8 +2840,9 @@ class MedicalAnalysisSystem:
             yearly_monthly = data.groupby(['Год', 'Месяц'])['Количество'].sum().unstack(fill_value=0)
             
             if len(yearly_monthly.index) > 1:
-                for year in yearly_monthly.index:
-                    ax4.plot(range(1, 13), yearly_monthly.loc[year], marker='o', label=str(year), linewidth=2)
+                # Все годы одним вызовом: столбцы матрицы - линии, по оси X - фактические месяцы
+                ax4.plot(yearly_monthly.columns.to_numpy(), yearly_monthly.to_numpy().T, marker='o',
+                         linewidth=2, label=[str(year) for year in yearly_monthly.index])
                 ax4.set_xlabel('Месяц')
                 ax4.set_ylabel('Количество случаев')
                 ax4.set_title('Сравнение сезонности по годам', fontsize=14, fontweight='bold')
@@ -2192,16 +2853,7 @@ class MedicalAnalysisSystem:
                 ax4.text(0.5, 0.5, 'Недостаточно данных\nдля сравнения по годам', 
                         ha='center', va='center', transform=ax4.transAxes, fontsize=12)
             
-            plt.tight_layout()
-            
-            # Встраивание графика в интерфейс
-            canvas = FigureCanvasTkAgg(fig, master=self.analysis_plot_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            self.analysis_canvas = canvas
-            self.analysis_canvas = canvas
-            self.analysis_canvas = canvas
-            self.analysis_canvas = canvas
+            self._draw_analysis()
             
             self.update_status("Анализ сезонности выполнен успешно")
             
@@ -2211,18 +2863,19 @@ class MedicalAnalysisSystem:
     def analyze_regions(self):
         """Анализ заболеваемости по регионам"""
         try:
-            # Создание фигуры
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
-
             # Подготовка данных
             data = self.get_analysis_filtered_data()
             if data is None or len(data) == 0:
                 messagebox.showwarning("Предупреждение", "Нет данных для выбранных фильтров")
                 return
-            regional_data = data.groupby('Регион')['Количество'].sum().sort_values(ascending=False)
+
+            # Постоянная фигура анализа
+            fig, (ax1, ax2, ax3, ax4) = self._get_analysis_axes()
+
+            regional_data = data.groupby('Регион', observed=True)['Количество'].sum().sort_values(ascending=False)
             
             # График 1: Столбчатая диаграмма по регионам
-            colors = plt.cm.viridis(np.linspace(0, 1, len(regional_data)))
+            colors = _palette('viridis', 0, 1, len(regional_data))
             bars = ax1.bar(range(len(regional_data)), regional_data.values, color=colors)
             ax1.set_xticks(range(len(regional_data)))
             ax1.set_xticklabels(regional_data.index, rotation=45, ha='right')
@@ -2238,45 +2891,49 @@ class MedicalAnalysisSystem:
                         f'{value:,.0f}', ha='center', va='bottom', fontsize=8)
             
             # График 2: Круговая диаграмма топ-регионов
-            top_regions = regional_data.head(8)
-            others = regional_data[8:].sum()
+            pie_values = regional_data.to_numpy()
+            pie_labels = regional_data.index.to_numpy()
+            others = pie_values[8:].sum()
+            pie_values, pie_labels = pie_values[:8], pie_labels[:8]
             if others > 0:
-                plot_data = pd.concat([top_regions, pd.Series([others], index=['Другие'])])
-            else:
-                plot_data = top_regions
+                pie_values = np.append(pie_values, others)
+                pie_labels = np.append(pie_labels, 'Другие')
                 
-            ax2.pie(plot_data.values, labels=plot_data.index, autopct='%1.1f%%', startangle=90)
+            ax2.pie(pie_values, labels=pie_labels, autopct='%1.1f%%', startangle=90)
             ax2.set_title('Доля регионов в общей заболеваемости', fontsize=14, fontweight='bold')
             
             # График 3: Тепловая карта регион-заболевание
             if 'Заболевание' in data.columns:
                 try:
-                    heatmap_data = data.pivot_table(index='Регион', columns='Заболевание', 
-                                                  values='Количество', aggfunc='sum', fill_value=0)
+                    # Порядок строк не важен: топ выбирается по суммам ниже
+                    heatmap_data = data.groupby(['Регион', 'Заболевание'], observed=True, sort=False)['Количество'].sum().unstack(fill_value=0)
                     
                     # Берем топ-10 регионов и топ-5 заболеваний для читаемости
-                    top_regions_heat = heatmap_data.sum(axis=1).sort_values(ascending=False).head(10).index
-                    top_diseases_heat = heatmap_data.sum(axis=0).sort_values(ascending=False).head(5).index
+                    top_regions_heat = _top_k(heatmap_data.sum(axis=1), 10).index
+                    top_diseases_heat = _top_k(heatmap_data.sum(axis=0), 5).index
                     
                     heatmap_subset = heatmap_data.loc[top_regions_heat, top_diseases_heat]
                     
-                    im = ax3.imshow(heatmap_subset.values, cmap='YlOrRd', aspect='auto')
-                    ax3.set_xticks(range(len(heatmap_subset.columns)))
-                    ax3.set_yticks(range(len(heatmap_subset.index)))
+                    n_rows, n_cols = heatmap_subset.shape
+                    im = ax3.pcolormesh(np.arange(n_cols + 1), np.arange(n_rows + 1), heatmap_subset.to_numpy(),
+                                        cmap='YlOrRd', shading='flat')
+                    ax3.invert_yaxis()  # Первая строка сверху, как у imshow
+                    ax3.set_xticks(np.arange(n_cols) + 0.5)
+                    ax3.set_yticks(np.arange(n_rows) + 0.5)
                     ax3.set_xticklabels(heatmap_subset.columns, rotation=45, ha='right')
                     ax3.set_yticklabels(heatmap_subset.index)
                     ax3.set_title('Тепловая карта: Топ регионы × заболевания', fontsize=14, fontweight='bold')
                     
                     # Цветовая шкала
-                    plt.colorbar(im, ax=ax3, label='Количество случаев')
+                    fig.colorbar(im, ax=ax3, label='Количество случаев')
                     
                 except Exception as e:
                     ax3.text(0.5, 0.5, f'Ошибка построения\nтепловой карты:\n{str(e)}', 
                             ha='center', va='center', transform=ax3.transAxes)
             
             # График 4: Статистика по регионам
-            regional_stats = data.groupby('Регион')['Количество'].agg(['sum', 'mean', 'std']).fillna(0)
-            regional_stats = regional_stats.sort_values('sum', ascending=True).tail(10)  # Топ-10
+            regional_stats = data.groupby('Регион', observed=True)['Количество'].agg(['sum', 'mean', 'std']).fillna(0)
+            regional_stats = regional_stats.loc[_top_k(regional_stats['sum'], 10).index[::-1]]  # Топ-10 по возрастанию
             
             ax4.barh(range(len(regional_stats)), regional_stats['sum'], color='lightcoral', alpha=0.7, label='Всего')
             ax4.set_yticks(range(len(regional_stats)))
@@ -2285,12 +2942,7 @@ class MedicalAnalysisSystem:
             ax4.set_title('Топ-10 регионов (горизонтальная диаграмма)', fontsize=14, fontweight='bold')
             ax4.grid(True, axis='x', alpha=0.3)
             
-            plt.tight_layout()
-            
-            # Встраивание графика
-            canvas = FigureCanvasTkAgg(fig, master=self.analysis_plot_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            self._draw_analysis()
             
             self.update_status("Анализ по регионам выполнен успешно")
             
@@ -2304,25 +2956,26 @@ class MedicalAnalysisSystem:
                 messagebox.showwarning("Предупреждение", "В данных отсутствует колонка 'Возраст'")
                 return
             
-            # Создание фигуры
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
-
             # Подготовка данных
             data = self.get_analysis_filtered_data()
             if data is None or len(data) == 0:
                 messagebox.showwarning("Предупреждение", "Нет данных для выбранных фильтров")
                 return
+
+            # Постоянная фигура анализа
+            fig, (ax1, ax2, ax3, ax4) = self._get_analysis_axes()
+
             data = data.dropna(subset=['Возраст'])  # Убираем записи без возраста
             
             # Создание возрастных групп
-            data['Возрастная группа'] = pd.cut(data['Возраст'], 
-                                              bins=[0, 14, 30, 45, 60, 100],
-                                              labels=['0-14', '15-30', '31-45', '46-60', '60+'])
-            
-            # График 1: Распределение по возрастным группам
-            age_data = data.groupby('Возрастная группа')['Количество'].sum()
-            colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
-            bars = ax1.bar(age_data.index, age_data.values, color=colors[:len(age_data)])
+            data['Возрастная группа'] = pd.cut(data['Возраст'].to_numpy(), bins=self._age_bins,
+                                              labels=self._age_labels)
+            
+            # График 1: Распределение по возрастным группам (только непустые группы)
+            age_data = data.groupby('Возрастная группа', observed=True)['Количество'].sum()
+            group_colors = dict(zip(self._age_labels, ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']))
+            bars = ax1.bar(age_data.index.astype(str), age_data.values,
+                           color=[group_colors[group] for group in age_data.index])
             ax1.set_xlabel('Возрастная группа')
             ax1.set_ylabel('Количество случаев')
             ax1.set_title('Заболеваемость по возрастным группам', fontsize=14, fontweight='bold')
@@ -2336,7 +2989,7 @@ class MedicalAnalysisSystem:
             
             # График 2: Средний возраст по заболеваниям
             if 'Заболевание' in data.columns:
-                disease_age = data.groupby('Заболевание')['Возраст'].mean().sort_values()
+                disease_age = data.groupby('Заболевание', observed=True, sort=False)['Возраст'].mean().sort_values()
                 ax2.barh(disease_age.index, disease_age.values, color='lightgreen')
                 ax2.set_xlabel('Средний возраст')
                 ax2.set_ylabel('Заболевание')
@@ -2344,7 +2997,7 @@ class MedicalAnalysisSystem:
                 ax2.grid(True, axis='x', alpha=0.3)
             
             # График 3: Гистограмма возрастов
-            ax3.hist(data['Возраст'], bins=20, color='skyblue', alpha=0.7, edgecolor='black')
+            ax3.hist(data['Возраст'], bins=20, color='skyblue', alpha=0.7, edgecolor='black', rasterized=True)
             ax3.set_xlabel('Возраст')
             ax3.set_ylabel('Частота')
             ax3.set_title('Распределение возрастов пациентов', fontsize=14, fontweight='bold')
@@ -2353,7 +3006,7 @@ class MedicalAnalysisSystem:
             # График 4: Возрастные группы по полу (если есть данные)
             if 'Пол' in data.columns:
                 try:
-                    gender_age = data.groupby(['Возрастная группа', 'Пол'])['Количество'].sum().unstack(fill_value=0)
+                    gender_age = data.groupby(['Возрастная группа', 'Пол'], observed=True)['Количество'].sum().unstack(fill_value=0)
                     gender_age.plot(kind='bar', ax=ax4, color=['lightblue', 'lightpink'])
                     ax4.set_xlabel('Возрастная группа')
                     ax4.set_ylabel('Количество случаев')
@@ -2367,9 +3020,9 @@ class MedicalAnalysisSystem:
             else:
                 # Box plot возрастов по заболеваниям
                 if 'Заболевание' in data.columns:
-                    diseases_for_box = data['Заболевание'].value_counts().head(5).index
-                    box_data = [data[data['Заболевание'] == disease]['Возраст'].values 
-                               for disease in diseases_for_box]
+                    diseases_for_box = _top_k(data.groupby('Заболевание', observed=True, sort=False).size(), 5).index
+                    ages_by_disease = data.groupby('Заболевание', observed=True, sort=False)['Возраст'].apply(np.asarray)
+                    box_data = ages_by_disease.loc[diseases_for_box].tolist()
                     ax4.boxplot(box_data, labels=diseases_for_box)
                     ax4.set_xlabel('Заболевание')
                     ax4.set_ylabel('Возраст')
@@ -2377,12 +3030,7 @@ class MedicalAnalysisSystem:
                     ax4.tick_params(axis='x', rotation=45)
                     ax4.grid(True, alpha=0.3)
             
-            plt.tight_layout()
-            
-            # Встраивание графика
-            canvas = FigureCanvasTkAgg(fig, master=self.analysis_plot_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            self._draw_analysis()
             
             self.update_status("Анализ по возрастным группам выполнен успешно")
             
@@ -2392,65 +3040,81 @@ class MedicalAnalysisSystem:
     def analyze_correlation(self):
         """Анализ корреляций между факторами"""
         try:
-            # Создание фигуры
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
-
             # Подготовка данных для корреляционной матрицы
             data = self.get_analysis_filtered_data()
             if data is None or len(data) == 0:
                 messagebox.showwarning("Предупреждение", "Нет данных для выбранных фильтров")
                 return
             
-            # Выбираем только числовые колонки
-            numeric_data = data.select_dtypes(include=[np.number])
+            # Выбираем только числовые колонки (один раз на весь анализ)
+            num_cols = data.select_dtypes(include=[np.number]).columns
+            numeric_data = data[num_cols]
             
-            if len(numeric_data.columns) < 2:
+            if len(num_cols) < 2:
                 messagebox.showwarning("Предупреждение", "Недостаточно числовых данных для анализа корреляций")
                 return
+
+            # Постоянная фигура анализа
+            fig, (ax1, ax2, ax3, ax4) = self._get_analysis_axes()
             
             # График 1: Корреляционная матрица
             corr_matrix = numeric_data.corr()
-            
-            im = ax1.imshow(corr_matrix.values, cmap='RdBu_r', vmin=-1, vmax=1, aspect='auto')
-            ax1.set_xticks(range(len(corr_matrix.columns)))
-            ax1.set_yticks(range(len(corr_matrix.index)))
+            corr_values_2d = corr_matrix.values
+            iu = np.triu_indices_from(corr_values_2d, k=1)
+            
+            n_corr = corr_values_2d.shape[0]
+            edges = np.arange(n_corr + 1)
+            im = ax1.pcolormesh(edges, edges, corr_values_2d, cmap='RdBu_r', vmin=-1, vmax=1, shading='flat')
+            ax1.invert_yaxis()  # Первая строка сверху, как у imshow
+            centers = np.arange(n_corr) + 0.5
+            ax1.set_xticks(centers)
+            ax1.set_yticks(centers)
             ax1.set_xticklabels(corr_matrix.columns, rotation=45, ha='right')
             ax1.set_yticklabels(corr_matrix.index)
             ax1.set_title('Корреляционная матрица', fontsize=14, fontweight='bold')
             
-            # Добавляем значения корреляций на график
-            for i in range(len(corr_matrix.index)):
-                for j in range(len(corr_matrix.columns)):
-                    text = ax1.text(j, i, f'{corr_matrix.iloc[i, j]:.2f}',
-                                   ha="center", va="center", 
-                                   color="black" if abs(corr_matrix.iloc[i, j]) < 0.5 else "white")
+            # Значения корреляций подписываем только на небольших матрицах
+            if n_corr <= 8:
+                cell_labels = np.char.mod('%.2f', corr_values_2d)
+                cell_colors = np.where(np.abs(corr_values_2d) < 0.5, 'black', 'white')
+                for i, j in np.ndindex(corr_values_2d.shape):
+                    ax1.text(centers[j], centers[i], cell_labels[i, j], ha="center", va="center",
+                             color=cell_colors[i, j])
             
-            plt.colorbar(im, ax=ax1, label='Коэффициент корреляции')
+            fig.colorbar(im, ax=ax1, label='Коэффициент корреляции')
             
             # График 2: Scatter plot самых коррелированных переменных
-            if len(numeric_data.columns) >= 2:
+            if len(num_cols) >= 2:
                 # Находим пару с наибольшей корреляцией (исключая диагональ)
-                corr_abs = np.abs(corr_matrix.values)
+                corr_abs = np.abs(corr_values_2d)
                 np.fill_diagonal(corr_abs, 0)
                 max_corr_idx = np.unravel_index(np.argmax(corr_abs), corr_abs.shape)
                 
                 var1, var2 = corr_matrix.columns[max_corr_idx[1]], corr_matrix.index[max_corr_idx[0]]
                 
-                ax2.scatter(numeric_data[var1], numeric_data[var2], alpha=0.6, color='steelblue')
+                # Пары без пропусков; на больших данных - выборка из 5000 точек
+                xy = numeric_data[[var1, var2]].dropna().to_numpy(dtype=float)
+                if len(xy) > 5000:
+                    xy = xy[np.random.default_rng(0).choice(len(xy), 5000, replace=False)]
+                x_values, y_values = xy[:, 0], xy[:, 1]
+                
+                # Растровый слой: при сохранении в PDF/SVG точки не выводятся поштучно векторами
+                ax2.scatter(x_values, y_values, alpha=0.6, color='steelblue', rasterized=True)
                 ax2.set_xlabel(var1)
                 ax2.set_ylabel(var2)
                 ax2.set_title(f'Scatter plot: {var1} vs {var2}\nКорреляция: {corr_matrix.loc[var2, var1]:.3f}', 
                              fontsize=12, fontweight='bold')
                 ax2.grid(True, alpha=0.3)
                 
-                # Добавляем линию тренда
-                z = np.polyfit(numeric_data[var1].dropna(), numeric_data[var2].dropna(), 1)
-                p = np.poly1d(z)
-                ax2.plot(numeric_data[var1], p(numeric_data[var1]), "r--", alpha=0.8)
+                # Добавляем линию тренда (прямая задается двумя крайними точками)
+                if len(xy) >= 2:
+                    z = np.polyfit(x_values, y_values, 1)
+                    x_line = np.array([x_values.min(), x_values.max()])
+                    ax2.plot(x_line, np.polyval(z, x_line), "r--", alpha=0.8)
             
             # График 3: Распределение корреляций
-            corr_values = corr_matrix.values[np.triu_indices_from(corr_matrix.values, k=1)]
-            ax3.hist(corr_values, bins=20, color='lightcoral', alpha=0.7, edgecolor='black')
+            corr_values = corr_values_2d[iu]
+            ax3.hist(corr_values, bins=20, color='lightcoral', alpha=0.7, edgecolor='black', rasterized=True)
             ax3.set_xlabel('Коэффициент корреляции')
             ax3.set_ylabel('Частота')
             ax3.set_title('Распределение коэффициентов корреляции', fontsize=14, fontweight='bold')
@@ -2460,21 +3124,16 @@ class MedicalAnalysisSystem:
             # График 4: Тепловая карта временных корреляций
             if 'Дата' in data.columns:
                 try:
-                    data['Дата_dt'] = pd.to_datetime(data['Дата'])
-                    data['Месяц'] = data['Дата_dt'].dt.month
-                    
-                    # Корреляция по месяцам
-                    monthly_corr = []
-                    months = []
+                    month_key = data['Дата_dt'].dt.month
                     
-                    for month in range(1, 13):
-                        month_data = data[data['Месяц'] == month]
-                        if len(month_data) > 5:  # Минимум данных для корреляции
-                            month_numeric = month_data.select_dtypes(include=[np.number])
-                            if len(month_numeric.columns) >= 2:
-                                corr = month_numeric.corr().iloc[0, 1] if len(month_numeric.columns) == 2 else month_numeric.corr().values[0, 1]
-                                monthly_corr.append(corr)
-                                months.append(month)
+                    # Корреляция первых двух числовых признаков по месяцам одной группировкой
+                    col_a, col_b = num_cols[0], num_cols[1]
+                    grouped = data[[col_a, col_b]].groupby(month_key)
+                    sizes = grouped.size()
+                    month_corr = grouped.corr().xs(col_a, level=1)[col_b]
+                    month_corr = month_corr[sizes.reindex(month_corr.index) > 5]  # Минимум данных для корреляции
+                    months = month_corr.index.astype(int).tolist()
+                    monthly_corr = month_corr.tolist()
                     
                     if monthly_corr:
                         ax4.plot(months, monthly_corr, marker='o', linewidth=2, markersize=8, color='green')
@@ -2493,12 +3152,7 @@ class MedicalAnalysisSystem:
                 ax4.text(0.5, 0.5, 'Колонка "Дата"\nне найдена', 
                         ha='center', va='center', transform=ax4.transAxes)
             
-            plt.tight_layout()
-            
-            # Встраивание графика
-            canvas = FigureCanvasTkAgg(fig, master=self.analysis_plot_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            self._draw_analysis()
             
             self.update_status("Анализ корреляций выполнен успешно")
             
@@ -2513,7 +3167,6 @@ class MedicalAnalysisSystem:
                 messagebox.showwarning("Предупреждение", "Нет данных для выбранных фильтров")
                 return
 
-            data['Дата_dt'] = pd.to_datetime(data['Дата'])
             data['year'] = data['Дата_dt'].dt.year
             data['month'] = data['Дата_dt'].dt.month
             cases_month = data.groupby(['year', 'month'])['Количество'].sum().reset_index()
@@ -2545,7 +3198,8 @@ class MedicalAnalysisSystem:
             merged['cases_growth'] = merged['Количество'].pct_change() * 100
             merged['mig_growth'] = merged['migrants'].pct_change() * 100
 
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 7))
+            fig = Figure(figsize=(10, 7))
+            ax1, ax2 = fig.subplots(2, 1)
             disease_label = self.disease_var.get() if self.disease_var.get() and self.disease_var.get() != 'Все' else 'Все заболевания'
             ax1.plot(merged['month'], merged['Количество'], marker='o', label=disease_label)
             ax1.plot(merged['month'], merged['migrants'], marker='s', label='Мигранты')
@@ -2569,7 +3223,7 @@ class MedicalAnalysisSystem:
             ax2.grid(True, alpha=0.3)
             ax2.legend()
 
-            plt.tight_layout()
+            fig.tight_layout()
             canvas = FigureCanvasTkAgg(fig, master=self.analysis_plot_frame)
             canvas.draw()
             canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
@@ -2586,7 +3240,6 @@ class MedicalAnalysisSystem:
             if data is None or len(data) == 0:
                 messagebox.showwarning('Предупреждение', 'Нет данных для выбранных фильтров')
                 return
-            data['Дата_dt'] = pd.to_datetime(data['Дата'])
             data['month'] = data['Дата_dt'].dt.month
             cases = data.groupby('month')['Количество'].sum()
             disease_label = self.disease_var.get() if self.disease_var.get() and self.disease_var.get() != 'Все' else 'Все заболевания'
@@ -2613,7 +3266,8 @@ class MedicalAnalysisSystem:
             weather = weather.groupby('month')[['avg_temp', 'precipitation']].mean()
             df = pd.concat([cases, weather], axis=1).dropna()
 
-            fig, ax1 = plt.subplots(figsize=(10, 5))
+            fig = Figure(figsize=(10, 5))
+            ax1 = fig.subplots()
             ax1.plot(df.index, df['Количество'], color='steelblue', marker='o', label=disease_label)
             ax1.set_xlabel('Месяц')
             ax1.set_ylabel('Количество случаев')
@@ -2626,8 +3280,8 @@ class MedicalAnalysisSystem:
             ax2.set_ylabel('Температура / Осадки')
             ax2.legend(loc='upper right')
 
-            plt.title('Заболеваемость и погодные условия')
-            plt.tight_layout()
+            ax2.set_title('Заболеваемость и погодные условия')
+            fig.tight_layout()
             canvas = FigureCanvasTkAgg(fig, master=self.analysis_plot_frame)
             canvas.draw()
             canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
@@ -2645,7 +3299,7 @@ class MedicalAnalysisSystem:
                 messagebox.showwarning('Предупреждение', 'Нет данных для выбранных фильтров')
                 return
 
-            cases = data.groupby('Регион')['Количество'].sum().reset_index()
+            cases = data.groupby('Регион', observed=True)['Количество'].sum().reset_index()
             conn = sqlite3.connect(self.db_path)
             try:
                 econ = pd.read_sql_query('SELECT region, avg_income FROM economic_indicators', conn)
@@ -2657,7 +3311,8 @@ class MedicalAnalysisSystem:
                 messagebox.showwarning('Предупреждение', 'Нет экономических данных для анализа')
                 return
 
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(11, 5))
+            fig = Figure(figsize=(11, 5))
+            ax1, ax2 = fig.subplots(1, 2)
 
             df_sorted = df.sort_values('Количество', ascending=False)
             bars = ax1.bar(df_sorted['Регион'], df_sorted['Количество'], color='skyblue')
@@ -2680,7 +3335,7 @@ class MedicalAnalysisSystem:
             ax2.set_title('Доход vs Заболеваемость')
             ax2.grid(True, alpha=0.3)
 
-            plt.tight_layout()
+            fig.tight_layout()
             canvas = FigureCanvasTkAgg(fig, master=self.analysis_plot_frame)
             canvas.draw()
             canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
@@ -2690,62 +3345,83 @@ class MedicalAnalysisSystem:
         except Exception as e:
             messagebox.showerror('Ошибка', f'Ошибка экономического анализа: {str(e)}')
                     
+    def forecast_with_model(self, model_type):
+        """Прогноз выбранной моделью из меню (через общий фоновый запуск)"""
+        self.model_var.set(model_type)
+        self.build_forecast()
+
     def build_forecast(self):
         """Построение прогноза заболеваемости"""
         if self.current_data is None:
             messagebox.showwarning("Предупреждение", "Сначала загрузите данные!")
             return
+        if self._forecast_busy:
+            self.update_status("Прогноз уже строится, дождитесь завершения...")
+            return
             
         model_type = self.model_var.get()
         periods = self.forecast_period.get()
-        
-        # Очистка области графиков
-        for widget in self.forecast_plot_frame.winfo_children():
-            widget.destroy()
+        # Значения Tk-переменных считываются в главном потоке
+        region_filter_var = getattr(self, 'forecast_region_var', None)
+        region_filter = region_filter_var.get() if hasattr(region_filter_var, 'get') else region_filter_var
+        disease_filter_var = getattr(self, 'forecast_disease_var', None)
+        disease_filter = disease_filter_var.get() if hasattr(disease_filter_var, 'get') else disease_filter_var
+        
+        # Выбор модели в зависимости от доступности библиотек
+        if model_type == "XGBoost":
+            # Проверяем глобальную переменную
+            if globals().get('XGBOOST_AVAILABLE', False):
+                worker = self.forecast_xgboost
+            else:
+                # Показываем информативное сообщение
+                messagebox.showinfo("XGBoost недоступен", 
+                                "XGBoost не установлен или не может быть загружен.\n\n"
+                                "Статус установки библиотек:\n"
+                                f"• XGBoost: {globals().get('XGBOOST_AVAILABLE', False)}\n"
+                                f"• scikit-learn: {globals().get('SKLEARN_AVAILABLE', False)}\n"
+                                f"• statsmodels: {globals().get('STATSMODELS_AVAILABLE', False)}\n\n"
+                                "Попробуйте перезапустить программу после установки библиотек.")
+                # Переключаемся на SARIMA как запасной вариант
+                self.model_var.set("SARIMA")
+                worker = self.forecast_sarima
+                
+        elif model_type == "Gradient Boosting":
+            if globals().get('SKLEARN_AVAILABLE', False):
+                worker = self.forecast_ml
+            else:
+                messagebox.showerror("Ошибка", "scikit-learn не установлен!\nПереключение на SARIMA.")
+                self.model_var.set("SARIMA")
+                worker = self.forecast_sarima
+                
+        elif model_type == "Linear Regression":
+            if globals().get('SKLEARN_AVAILABLE', False):
+                worker = self.forecast_linear_regression
+            else:
+                messagebox.showerror("Ошибка", "scikit-learn не установлен!\nПереключение на SARIMA.")
+                self.model_var.set("SARIMA")
+                worker = self.forecast_sarima
+        else:
+            # SARIMA по умолчанию - всегда доступен
+            worker = self.forecast_sarima
+            
+        # Повторный запрос с теми же параметрами на тех же данных - готовый прогноз из кеша
+        cache_key = (self.model_var.get(), periods, region_filter, disease_filter)
+        cached = self._forecast_cache.get(cache_key)
+        if cached is not None:
+            self._render_forecast(cached)
+            return
             
+        self._forecast_busy = True
         self.update_status(f"Строится прогноз {model_type}...")
-        self.root.update()  # Обновляем интерфейс
-            
+        future = self._executor.submit(self._run_forecast, worker, model_type,
+                                       periods, region_filter, disease_filter)
+        self.root.after(100, self._poll_forecast, future, self._forecast_cache, cache_key)
+
+    def _run_forecast(self, worker, model_type, *args):
+        """Обучение модели в фоновом потоке; возвращает данные для отрисовки"""
         try:
-            # Создание прогноза в зависимости от выбранной модели
-            if model_type == "XGBoost":
-                # Проверяем глобальную переменную
-                if globals().get('XGBOOST_AVAILABLE', False):
-                    self.forecast_xgboost()
-                else:
-                    # Показываем информативное сообщение
-                    messagebox.showinfo("XGBoost недоступен", 
-                                    "XGBoost не установлен или не может быть загружен.\n\n"
-                                    "Статус установки библиотек:\n"
-                                    f"• XGBoost: {globals().get('XGBOOST_AVAILABLE', False)}\n"
-                                    f"• scikit-learn: {globals().get('SKLEARN_AVAILABLE', False)}\n"
-                                    f"• statsmodels: {globals().get('STATSMODELS_AVAILABLE', False)}\n\n"
-                                    "Попробуйте перезапустить программу после установки библиотек.")
-                    # Переключаемся на SARIMA как запасной вариант
-                    self.model_var.set("SARIMA")
-                    self.forecast_sarima()
-                    
-            elif model_type == "Random Forest":
-                if globals().get('SKLEARN_AVAILABLE', False):
-                    self.forecast_ml()
-                else:
-                    messagebox.showerror("Ошибка", "scikit-learn не установлен!\nПереключение на SARIMA.")
-                    self.model_var.set("SARIMA")
-                    self.forecast_sarima()
-                    
-            elif model_type == "Linear Regression":
-                if globals().get('SKLEARN_AVAILABLE', False):
-                    self.forecast_linear_regression()
-                else:
-                    messagebox.showerror("Ошибка", "scikit-learn не установлен!\nПереключение на SARIMA.")
-                    self.model_var.set("SARIMA")
-                    self.forecast_sarima()
-            else:
-                # SARIMA по умолчанию - всегда доступен
-                self.forecast_sarima()
-                
+            return worker(*args)
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка при построении прогноза {model_type}: {str(e)}")
             # Показываем traceback для отладки
             import traceback
             print(f"Полная ошибка в {model_type}:")
@@ -2754,132 +3430,101 @@ class MedicalAnalysisSystem:
             # Пробуем запасной вариант - SARIMA
             try:
                 print("Попытка использовать SARIMA как запасной вариант...")
-                self.model_var.set("SARIMA")
-                self.forecast_sarima()
+                payload = self.forecast_sarima(*args)
+                payload['fallback_error'] = f"Ошибка при построении прогноза {model_type}: {str(e)}"
+                return payload
             except Exception as fallback_error:
-                messagebox.showerror("Критическая ошибка", 
-                                f"Не удалось построить ни один прогноз:\n{str(fallback_error)}")
                 print(f"Ошибка в запасном SARIMA: {fallback_error}")
-                
+                return {'critical': f"Не удалось построить ни один прогноз:\n{str(fallback_error)}"}
+
+    def _poll_forecast(self, future, cache, cache_key):
+        """Ожидание фонового прогноза без блокировки главного цикла Tk
+
+        Успешный прогноз сохраняется в кеш, действовавший при запуске: если данные за это
+        время перезагрузили, результат попадает в уже отброшенный словарь.
+        """
+        if not future.done():
+            self.root.after(100, self._poll_forecast, future, cache, cache_key)
+            return
+        self._forecast_busy = False
+        payload = future.result()
+        if 'fig' in payload and 'fallback_error' not in payload:
+            if len(cache) >= 8:
+                cache.pop(next(iter(cache)))
+            cache[cache_key] = payload
+        self._render_forecast(payload)
+
+    def _render_forecast(self, payload):
+        """Встраивание готового прогноза в интерфейс (только главный поток)"""
+        if 'fallback_error' in payload:
+            messagebox.showerror("Ошибка", payload['fallback_error'])
+            self.model_var.set("SARIMA")
+        if 'critical' in payload:
+            messagebox.showerror("Критическая ошибка", payload['critical'])
             self.update_status("Ошибка при построении прогноза")
+            return
+        if 'error' in payload:
+            messagebox.showerror("Ошибка", payload['error'])
+            return
+        if 'warning' in payload:
+            messagebox.showwarning("Предупреждение", payload['warning'])
+            return
+        
+        self._embed_canvas(payload['fig'])
+        
+        # Сохранение результатов
+        self.forecast_results = payload['results']
+        self.update_status(payload['status'])
+
+    def _embed_canvas(self, fig):
+        """Встраивание готовой фигуры прогноза в область графиков
 
-    def forecast_sarima(self):
-        """Прогнозирование SARIMA"""
+        Фигура и ее компоновка (tight_layout) уже построены в фоновом потоке; растеризация
+        откладывается до простоя Tk, чтобы не рисовать дважды - до и после изменения размера
+        виджета при упаковке. Холст создается один раз, дальше на нем меняется только фигура.
+        """
+        canvas = self._forecast_canvas
+        if canvas is None:
+            # Очистка области графиков (информационная панель до первого прогноза)
+            for widget in self.forecast_plot_frame.winfo_children():
+                widget.destroy()
+            
+            canvas = FigureCanvasTkAgg(fig, master=self.forecast_plot_frame)
+            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            self._forecast_canvas = canvas
+        else:
+            # Подстановка новой фигуры в размер уже упакованного виджета
+            widget = canvas.get_tk_widget()
+            width, height = widget.winfo_width(), widget.winfo_height()
+            fig.set_canvas(canvas)
+            canvas.figure = fig
+            # DPI от базового значения: закешированная фигура может показываться повторно
+            fig.set_dpi(plt.rcParams['figure.dpi'] * canvas.device_pixel_ratio)
+            if width > 1 and height > 1:
+                fig.set_size_inches(width / fig.dpi, height / fig.dpi, forward=False)
+        canvas.draw_idle()
+        return canvas
+
+    def forecast_sarima(self, periods, region_filter=None, disease_filter=None):
+        """Прогнозирование SARIMA (фоновый поток, возвращает данные для отрисовки)"""
         try:
             # Подготовка данных
-            data = self.current_data.copy()
-            region_filter_var = getattr(self, 'forecast_region_var', None)
-            region_filter = region_filter_var.get() if hasattr(region_filter_var, 'get') else region_filter_var
-            if region_filter and region_filter != 'Все' and 'Регион' in data.columns:
-                data = data[data['Регион'] == region_filter]
-            disease_filter_var = getattr(self, 'forecast_disease_var', None)
-            disease_filter = disease_filter_var.get() if hasattr(disease_filter_var, 'get') else disease_filter_var
-            if disease_filter and disease_filter != 'Все' and 'Заболевание' in data.columns:
-                data = data[data['Заболевание'] == disease_filter]
-            data['Дата'] = pd.to_datetime(data['Дата'], errors='coerce')
-            data = data.dropna(subset=['Дата'])
-            monthly_data = data.resample('MS', on='Дата')['Количество'].sum()
+            monthly_data = self._prepare_monthly(region_filter, disease_filter)['Количество']
 
             if (monthly_data > 0).sum() < 24:
-                messagebox.showwarning("Предупреждение", "Недостаточно данных для SARIMA (нужно минимум 24 месяца)")
-                return
+                return {'warning': "Недостаточно данных для SARIMA (нужно минимум 24 месяца)"}
 
             monthly_data = monthly_data[monthly_data > 0]
             
-            # Проверка стационарности
-            def check_stationarity(timeseries):
-                """Проверка стационарности временного ряда"""
-                if STATSMODELS_AVAILABLE:
-                    result = adfuller(timeseries)
-                    return result[1] < 0.05  # p-value < 0.05 означает стационарность
-                return True  # Предполагаем стационарность, если statsmodels недоступен
-            
-            # Приведение к стационарному виду
-            diff_data = monthly_data
-            diff_order = 0
-            
+            # ARIMA из statsmodels; при ошибке или без statsmodels - упрощенная модель на том же ряде
+            arima_orders = None
             if STATSMODELS_AVAILABLE:
-                while not check_stationarity(diff_data.dropna()) and diff_order < 2:
-                    diff_data = diff_data.diff()
-                    diff_order += 1
-            
-            # Простая реализация ARIMA без statsmodels
-            if not STATSMODELS_AVAILABLE:
-                # Упрощенная модель: экспоненциальное сглаживание с трендом и сезонностью
-                periods = self.forecast_period.get()
-                
-                # Вычисляем тренд
-                X = np.arange(len(monthly_data))
-                trend_coef = np.polyfit(X, monthly_data.values, 1)
-                
-                # Вычисляем сезонную компоненту (12-месячная)
-                seasonal_component = np.zeros(12)
-                for i in range(12):
-                    month_values = [monthly_data.iloc[j] for j in range(i, len(monthly_data), 12)]
-                    if month_values:
-                        seasonal_component[i] = np.mean(month_values) - monthly_data.mean()
-                
-                # Прогноз
-                last_value = monthly_data.iloc[-1]
-                last_date = monthly_data.index[-1]
-                forecast_dates = pd.date_range(start=last_date + pd.DateOffset(months=1), 
-                                            periods=periods, freq='M')
-                forecast_values = []
-                
-                for i in range(periods):
-                    # Тренд
-                    trend_value = trend_coef[0] * (len(monthly_data) + i) + trend_coef[1]
-                    
-                    # Сезонность
-                    month_idx = (last_date.month + i) % 12
-                    seasonal_value = seasonal_component[month_idx]
-                    
-                    # Объединяем компоненты
-                    forecast_val = max(0, trend_value + seasonal_value)
-                    forecast_values.append(forecast_val)
-                
-                # method_name = "Упрощенная SARIMA (тренд + сезонность)"
-                
-            else:
-                # Используем настоящую ARIMA из statsmodels
                 try:
-                    # Автоматический подбор параметров ARIMA
-                    best_aic = float('inf')
-                    best_model = None
-                    best_params = None
-                    
-                    # Простой перебор параметров
-                    for p in range(0, 3):
-                        for d in range(0, 2):
-                            for q in range(0, 3):
-                                try:
-                                    model = ARIMA(monthly_data, order=(p, d, q))
-                                    fitted_model = model.fit()
-                                    if fitted_model.aic < best_aic:
-                                        best_aic = fitted_model.aic
-                                        best_model = fitted_model
-                                        best_params = (p, d, q)
-                                except:
-                                    continue
-                    
-                    if best_model is None:
-                        raise ValueError("Не удалось подобрать подходящие параметры ARIMA")
-                    
-                    # Прогноз
-                    periods = self.forecast_period.get()
-                    forecast_result = best_model.forecast(steps=periods)
-                    forecast_values = np.maximum(forecast_result, 0)  # Неотрицательные значения
-                    
-                    last_date = monthly_data.index[-1]
-                    forecast_dates = pd.date_range(start=last_date + pd.DateOffset(months=1), 
-                                                periods=periods, freq='M')
-                    
-                    # method_name = f"ARIMA{best_params} (AIC: {best_aic:.1f})"
-                    
+                    forecast_dates, forecast_values, arima_orders = self._forecast_sarima_arima(monthly_data, periods)
                 except Exception as e:
-                    # Fallback к упрощенной модели
                     print(f"Ошибка ARIMA: {e}, используем упрощенную модель")
-                    return self.forecast_sarima()  # Рекурсивно с STATSMODELS_AVAILABLE = False
+            if arima_orders is None:
+                forecast_dates, forecast_values = self._forecast_sarima_fallback(monthly_data, periods)
             
             # Оценка точности на последних месяцах (простое разделение train/test)
             mae = None
@@ -2889,40 +3534,22 @@ class MedicalAnalysisSystem:
                 train_series = monthly_data[:-test_size]
                 test_series = monthly_data[-test_size:]
                 try:
-                    if STATSMODELS_AVAILABLE and best_params is not None:
-                        cv_model = ARIMA(train_series, order=best_params).fit()
+                    if arima_orders is not None:
+                        cv_model = ARIMA(train_series, order=arima_orders[0],
+                                         seasonal_order=arima_orders[1]).fit()
                         cv_forecast = cv_model.forecast(steps=test_size)
                     else:
-                        X = np.arange(len(train_series))
-                        t_coef = np.polyfit(X, train_series.values, 1)
-                        seasonal_component = np.zeros(12)
-                        for i in range(12):
-                            mv = [train_series.iloc[j] for j in range(i, len(train_series), 12)]
-                            if mv:
-                                seasonal_component[i] = np.mean(mv) - train_series.mean()
-                        last_date_cv = train_series.index[-1]
-                        cv_forecast = []
-                        for i in range(test_size):
-                            trend_val = t_coef[0] * (len(train_series) + i) + t_coef[1]
-                            month_idx = (last_date_cv.month + i) % 12
-                            season_val = seasonal_component[month_idx]
-                            cv_forecast.append(max(0, trend_val + season_val))
-                        cv_forecast = np.array(cv_forecast)
-
-                    if SKLEARN_AVAILABLE:
-                        mae = mean_absolute_error(test_series.values, cv_forecast)
-                        r2 = r2_score(test_series.values, cv_forecast)
-                    else:
-                        mae = float(np.mean(np.abs(test_series.values - cv_forecast)))
-                        ss_res = np.sum((test_series.values - cv_forecast) ** 2)
-                        ss_tot = np.sum((test_series.values - np.mean(test_series.values)) ** 2)
-                        r2 = 1 - ss_res / ss_tot if ss_tot != 0 else float('nan')
+                        cv_forecast = _trend_seasonal_forecast(
+                            train_series.to_numpy(), train_series.index[-1].month, test_size)
+
+                    mae, r2 = _regression_metrics(test_series.to_numpy(), cv_forecast)
                 except Exception:
                     mae = None
                     r2 = None
 
             # Создание графика
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 7))
+            fig = Figure(figsize=(12, 7))
+            ax1, ax2 = fig.subplots(1, 2)
             
             # График 1: Прогноз
             ax1.plot(monthly_data.index, monthly_data.values, 
@@ -2949,7 +3576,9 @@ class MedicalAnalysisSystem:
                 try:
                     decomposition = seasonal_decompose(monthly_data, model='additive', period=12)
 
-                    ax2.plot(monthly_data.index, decomposition.trend.dropna(),
+                    # Центрированное скользящее среднее не определено на краях ряда
+                    trend = decomposition.trend.dropna()
+                    ax2.plot(trend.index, trend.to_numpy(),
                             label='Тренд', linewidth=2, color='green')
                     ax2.plot(monthly_data.index, decomposition.seasonal,
                             label='Сезонность', linewidth=1, alpha=0.7, color='orange')
@@ -2970,15 +3599,10 @@ class MedicalAnalysisSystem:
             else:
                 fig.delaxes(ax2)
             
-            plt.tight_layout()
+            fig.tight_layout()
             
-            # Встраивание графика
-            canvas = FigureCanvasTkAgg(fig, master=self.forecast_plot_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            
-            # Сохранение результатов
-            self.forecast_results = {
+            # Результаты передаются в главный поток для встраивания графика
+            results = {
                 'dates': forecast_dates,
                 'values': forecast_values,
                 'model': 'SARIMA',
@@ -2988,47 +3612,76 @@ class MedicalAnalysisSystem:
             }
             
             if mae is not None and r2 is not None:
-                self.update_status(
-                    f"SARIMA прогноз построен на {periods} месяцев (MAE: {mae:.1f}, R²: {r2:.3f})"
-                )
+                status = f"SARIMA прогноз построен на {periods} месяцев (MAE: {mae:.1f}, R²: {r2:.3f})"
             else:
-                self.update_status(f"SARIMA прогноз построен на {periods} месяцев")
+                status = f"SARIMA прогноз построен на {periods} месяцев"
+            return {'fig': fig, 'results': results, 'status': status}
             
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка при построении SARIMA прогноза: {str(e)}")
+            return {'error': f"Ошибка при построении SARIMA прогноза: {str(e)}"}
+
+    def _forecast_sarima_fallback(self, monthly_data, periods):
+        """Упрощенная модель: линейный тренд и 12-месячная сезонность"""
+        last_date = monthly_data.index[-1]
+        forecast_dates = pd.date_range(start=last_date + pd.offsets.MonthBegin(1), 
+                                    periods=periods, freq='MS')
+        forecast_values = _trend_seasonal_forecast(monthly_data.to_numpy(), last_date.month, periods)
+        return forecast_dates, forecast_values
+
+    def _forecast_sarima_arima(self, monthly_data, periods):
+        """Прогноз ARIMA с автоподбором порядка: (даты, значения, (order, seasonal_order))"""
+        best_seasonal_params = (0, 0, 0, 0)
+        
+        if PMDARIMA_AVAILABLE:
+            # Пошаговый поиск Хайндмана-Хандакара вместо полного перебора
+            best_model = auto_arima(monthly_data, start_p=0, start_q=0, max_p=2, max_q=2,
+                                    d=None, seasonal=True, m=12, stepwise=True,
+                                    suppress_warnings=True, error_action='ignore')
+            best_params = best_model.order
+            best_seasonal_params = best_model.seasonal_order
+            forecast_result = best_model.predict(n_periods=periods)
+        else:
+            # Простой перебор параметров: 18 независимых обучений. Потоки - только на длинных
+            # рядах: на коротких запуск пула дороже самих обучений
+            param_grid = [(p, d, q) for p in range(3) for d in range(2) for q in range(3)]
+            if JOBLIB_AVAILABLE and len(monthly_data) >= 60:
+                results = Parallel(n_jobs=-1, prefer='threads')(
+                    delayed(_fit_arima_order)(monthly_data, order) for order in param_grid)
+            else:
+                results = [_fit_arima_order(monthly_data, order) for order in param_grid]
+            best_aic, best_params = min(results, key=lambda r: r[0])
+            
+            if not np.isfinite(best_aic):
+                raise ValueError("Не удалось подобрать подходящие параметры ARIMA")
+            
+            # Переобучение только лучшего порядка вместо передачи всех моделей из пула
+            best_model = ARIMA(monthly_data, order=best_params).fit()
+            forecast_result = best_model.forecast(steps=periods)
+        
+        # Прогноз
+        forecast_values = np.maximum(forecast_result, 0)  # Неотрицательные значения
+        
+        last_date = monthly_data.index[-1]
+        forecast_dates = pd.date_range(start=last_date + pd.offsets.MonthBegin(1), 
+                                    periods=periods, freq='MS')
+        return forecast_dates, forecast_values, (best_params, best_seasonal_params)
 
-    def forecast_xgboost(self):
-        """Прогнозирование с использованием XGBoost"""
+    def forecast_xgboost(self, periods, region_filter=None, disease_filter=None):
+        """Прогнозирование с использованием XGBoost (фоновый поток)"""
         if not XGBOOST_AVAILABLE:
-            messagebox.showerror("Ошибка", 
-                            "Библиотека XGBoost не установлена!\n\n"
-                            "Для установки выполните:\n"
-                            "pip install xgboost")
-            return
+            return {'error': "Библиотека XGBoost не установлена!\n\n"
+                             "Для установки выполните:\n"
+                             "pip install xgboost"}
             
         try:
             # Подготовка данных
-            data = self.current_data.copy()
-            region_filter_var = getattr(self, 'forecast_region_var', None)
-            region_filter = region_filter_var.get() if hasattr(region_filter_var, 'get') else region_filter_var
-            if region_filter and region_filter != 'Все' and 'Регион' in data.columns:
-                data = data[data['Регион'] == region_filter]
-            disease_filter_var = getattr(self, 'forecast_disease_var', None)
-            disease_filter = disease_filter_var.get() if hasattr(disease_filter_var, 'get') else disease_filter_var
-            if disease_filter and disease_filter != 'Все' and 'Заболевание' in data.columns:
-                data = data[data['Заболевание'] == disease_filter]
-            data['Дата'] = pd.to_datetime(data['Дата'], errors='coerce')
-            data = data.dropna(subset=['Дата'])
-
-            if len(data) == 0:
-                messagebox.showerror("Ошибка", "Нет корректных данных")
-                return
+            monthly_data = self._prepare_monthly(region_filter, disease_filter)['Количество']
 
-            monthly_data = data.resample('MS', on='Дата')['Количество'].sum()
+            if len(monthly_data) == 0:
+                return {'error': "Нет корректных данных"}
 
             if (monthly_data > 0).sum() < 12:
-                messagebox.showwarning("Предупреждение", "Недостаточно данных для XGBoost прогнозирования")
-                return
+                return {'warning': "Недостаточно данных для XGBoost прогнозирования"}
 
             monthly_data = monthly_data.reset_index()
             monthly_data['Месяц'] = monthly_data['Дата'].dt.month
@@ -3036,13 +3689,15 @@ class MedicalAnalysisSystem:
             monthly_data['Период'] = monthly_data['Год'] * 12 + monthly_data['Месяц']
             
             # Создание расширенных признаков
-            monthly_data['Лаг_1'] = monthly_data['Количество'].shift(1)
-            monthly_data['Лаг_2'] = monthly_data['Количество'].shift(2)
-            monthly_data['Лаг_3'] = monthly_data['Количество'].shift(3)
+            counts = monthly_data['Количество'].to_numpy(dtype=np.float64)
+            lags = _lag_matrix(counts, 3)
+            monthly_data['Лаг_1'] = lags[:, 0]
+            monthly_data['Лаг_2'] = lags[:, 1]
+            monthly_data['Лаг_3'] = lags[:, 2]
             
             # Скользящие средние
-            monthly_data['МА_3'] = monthly_data['Количество'].rolling(window=3, min_periods=1).mean()
-            monthly_data['МА_6'] = monthly_data['Количество'].rolling(window=6, min_periods=1).mean()
+            monthly_data['МА_3'] = _rolling_mean(counts, 3)
+            monthly_data['МА_6'] = _rolling_mean(counts, 6)
             
             # Сезонные признаки
             monthly_data['Сезон_sin'] = np.sin(2 * np.pi * monthly_data['Месяц'] / 12)
@@ -3055,131 +3710,112 @@ class MedicalAnalysisSystem:
             monthly_data = monthly_data.dropna()
             
             if len(monthly_data) < 8:
-                messagebox.showwarning("Предупреждение", "Недостаточно данных после обработки для XGBoost модели")
-                return
+                return {'warning': "Недостаточно данных после обработки для XGBoost модели"}
             
             # Подготовка признаков и целевой переменной
             feature_columns = ['Период', 'Месяц', 'Тренд', 'Лаг_1', 'Лаг_2', 'Лаг_3', 
                             'МА_3', 'МА_6', 'Сезон_sin', 'Сезон_cos']
             
-            X = monthly_data[feature_columns].values
-            y = monthly_data['Количество'].values
+            # float32: XGBoost все равно хранит признаки в одинарной точности
+            X = monthly_data[feature_columns].to_numpy(dtype=np.float32)
+            y = monthly_data['Количество'].to_numpy(dtype=np.float32)
             
             # Разделение на обучающую и тестовую выборки
             test_size = min(0.2, 3 / len(X))
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42, shuffle=False)
+            X_train, X_test, y_train, y_test = _chrono_split(X, y, test_size)
             
             # Обучение XGBoost модели
+            # Ранняя остановка: деревья добавляются, пока улучшается ошибка на последних месяцах
+            # обучающей выборки; тестовые месяцы остаются только для оценки качества.
+            # На коротких рядах валидационный хвост не выделяется
+            early_stopping = len(X_train) >= 20
+            if early_stopping:
+                X_fit, X_val, y_fit, y_val = _chrono_split(X_train, y_train, 0.2)
+            else:
+                X_fit, y_fit = X_train, y_train
             xgb_model = xgb.XGBRegressor(
-                n_estimators=100,
-                max_depth=6,
-                learning_rate=0.1,
+                n_estimators=300,
+                max_depth=4,
+                learning_rate=0.05,
                 random_state=42,
-                objective='reg:squarederror'
+                objective='reg:squarederror',
+                tree_method='hist',
+                n_jobs=-1,
+                early_stopping_rounds=10 if early_stopping else None
             )
             
-            xgb_model.fit(X_train, y_train)
+            if early_stopping:
+                xgb_model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+            else:
+                xgb_model.fit(X_fit, y_fit, verbose=False)
+            # Прямое предсказание по numpy-массиву без построения DMatrix на каждый вызов,
+            # только по деревьям до лучшей итерации ((0, 0) - все деревья)
+            booster = xgb_model.get_booster()
+            iteration_range = (0, xgb_model.best_iteration + 1) if early_stopping else (0, 0)
             
             # Оценка качества модели
-            y_pred = xgb_model.predict(X_test)
+            y_pred = booster.inplace_predict(X_test, iteration_range=iteration_range)
             mae = mean_absolute_error(y_test, y_pred)
             r2 = r2_score(y_test, y_pred)
             
             # Прогнозирование
-            periods = self.forecast_period.get()
-            forecast_values = []
-            forecast_dates = []
-            
-            last_period = monthly_data['Период'].iloc[-1]
+            # Календарные признаки всех шагов прогноза считаются сразу
+            last_period = int(monthly_data['Период'].to_numpy()[-1])
+            steps = np.arange(1, periods + 1)
+            period_vec = last_period + steps
+            year_vec = period_vec // 12
+            month_vec = period_vec % 12
+            december = month_vec == 0
+            month_vec[december] = 12
+            year_vec[december] -= 1
+            trend_vec = len(monthly_data) + steps - 1
+            sin_vec = np.sin(2 * np.pi * month_vec / 12)
+            cos_vec = np.cos(2 * np.pi * month_vec / 12)
+            
+            # Буфер значений: три последних исторических, затем прогнозы
+            history = monthly_data['Количество'].to_numpy(dtype=float)
+            recent = np.empty(3 + periods)
+            recent[:3] = history[-3:]
+            forecast_out = np.empty(periods)
+            feat = np.empty((1, len(feature_columns)), dtype=np.float32)
             
             for i in range(periods):
-                new_period = last_period + i + 1
-                new_year = new_period // 12
-                new_month = new_period % 12
-                if new_month == 0:
-                    new_month = 12
-                    new_year -= 1
-                
-                # Подготовка признаков
-                new_trend = len(monthly_data) + i
-                
-                # Лаговые признаки
-                if i == 0:
-                    lag_1 = monthly_data['Количество'].iloc[-1]
-                    lag_2 = monthly_data['Количество'].iloc[-2] if len(monthly_data) > 1 else lag_1
-                    lag_3 = monthly_data['Количество'].iloc[-3] if len(monthly_data) > 2 else lag_1
-                    ma_3 = monthly_data['Количество'].iloc[-3:].mean() if len(monthly_data) > 2 else lag_1
-                    ma_6 = monthly_data['Количество'].iloc[-6:].mean() if len(monthly_data) > 5 else lag_1
-                else:
-                    lag_1 = forecast_values[i-1] if i > 0 else monthly_data['Количество'].iloc[-1]
-                    lag_2 = forecast_values[i-2] if i > 1 else monthly_data['Количество'].iloc[-1]
-                    lag_3 = forecast_values[i-3] if i > 2 else monthly_data['Количество'].iloc[-1]
-                    
-                    recent_values = list(monthly_data['Количество'].iloc[-3:]) + forecast_values[:i]
-                    ma_3 = np.mean(recent_values[-3:])
-                    ma_6 = np.mean(recent_values[-6:])
-                
-                new_features = [
-                    new_period, new_month, new_trend, lag_1, lag_2, lag_3, ma_3, ma_6,
-                    np.sin(2 * np.pi * new_month / 12), np.cos(2 * np.pi * new_month / 12)
-                ]
+                # Календарные и лаговые признаки шага; predict остается в Python
+                _xgb_step_features(history, recent, i, float(period_vec[i]), float(month_vec[i]),
+                                   float(trend_vec[i]), sin_vec[i], cos_vec[i], feat[0])
                 
                 # Прогноз
-                X_new = np.array([new_features])
-                forecast_value = max(0, xgb_model.predict(X_new)[0])
-                forecast_values.append(forecast_value)
-                
-                # Создание дат прогноза
-                try:
-                    forecast_date = pd.Timestamp(year=int(new_year), month=int(new_month), day=1)
-                    forecast_dates.append(forecast_date)
-                except (ValueError, OverflowError) as e:
-                    # Если не можем создать дату, используем последнюю известную дату + offset
-                    last_known_date = pd.Timestamp(year=int(monthly_data['Год'].iloc[-1]), 
-                                                month=int(monthly_data['Месяц'].iloc[-1]), day=1)
-                    forecast_date = last_known_date + pd.DateOffset(months=i+1)
-                    forecast_dates.append(forecast_date)
+                forecast_value = max(0.0, float(booster.inplace_predict(feat, iteration_range=iteration_range)[0]))
+                forecast_out[i] = forecast_value
+                recent[i + 3] = forecast_value
+            forecast_values = forecast_out.tolist()
+            
+            # Даты прогноза одним векторным вызовом
+            forecast_dates = pd.DatetimeIndex(pd.to_datetime(
+                {'year': year_vec, 'month': month_vec, 'day': 1}, errors='coerce'))
             
             # Создание улучшенной визуализации
-            fig, ax1 = plt.subplots(figsize=(12, 7))
+            fig = Figure(figsize=(12, 7))
+            ax1 = fig.subplots()
             
             # График 1: Прогноз (более чистый дизайн)
-            try:
-                historical_dates = []
-                for _, row in monthly_data.iterrows():
-                    try:
-                        date = pd.Timestamp(year=int(row['Год']), month=int(row['Месяц']), day=1)
-                        historical_dates.append(date)
-                    except:
-                        continue
+            # Начала месяцев истории уже есть в столбце 'Дата'
+            historical_dates = monthly_data['Дата']
+            ax1.plot(historical_dates, monthly_data['Количество'], 
+                    label='Исторические данные', marker='o', linewidth=2.5, 
+                    color='#2E86AB', markersize=6, alpha=0.8)
+            
+            # Прогноз
+            if len(forecast_dates):
+                ax1.plot(forecast_dates, forecast_values, 
+                        label='Прогноз XGBoost', color='#E74C3C', marker='s', 
+                        linestyle='--', linewidth=3, markersize=7, alpha=0.9)
                 
-                if len(historical_dates) == len(monthly_data):
-                    # Исторические данные
-                    ax1.plot(historical_dates, monthly_data['Количество'], 
-                            label='Исторические данные', marker='o', linewidth=2.5, 
-                            color='#2E86AB', markersize=6, alpha=0.8)
-                    
-                    # Прогноз
-                    if forecast_dates:
-                        ax1.plot(forecast_dates, forecast_values, 
-                                label='Прогноз XGBoost', color='#E74C3C', marker='s', 
-                                linestyle='--', linewidth=3, markersize=7, alpha=0.9)
-                    
-                    # Добавляем вертикальную линию разделения
-                    if historical_dates and forecast_dates:
-                        ax1.axvline(x=historical_dates[-1], color='gray', linestyle=':', alpha=0.7, linewidth=2)
-                        ax1.text(historical_dates[-1], ax1.get_ylim()[1]*0.9, ' Прогноз начинается здесь', 
-                                rotation=90, verticalalignment='top', fontsize=10, color='gray')
-                    
-            except Exception as e:
-                print(f"Ошибка создания дат: {e}")
-                # Fallback к индексам
-                ax1.plot(range(len(monthly_data)), monthly_data['Количество'], 
-                        label='Исторические данные', marker='o', linewidth=2.5, color='#2E86AB')
-                if forecast_values:
-                    forecast_start = len(monthly_data)
-                    ax1.plot(range(forecast_start, forecast_start + len(forecast_values)), forecast_values, 
-                            label='Прогноз XGBoost', color='#E74C3C', marker='s', linestyle='--', linewidth=3)
+                # Добавляем вертикальную линию разделения
+                last_history_date = historical_dates.iloc[-1]
+                ax1.axvline(x=last_history_date, color='gray', linestyle=':', alpha=0.7, linewidth=2)
+                ax1.text(last_history_date, ax1.get_ylim()[1]*0.9, ' Прогноз начинается здесь', 
+                        rotation=90, verticalalignment='top', fontsize=10, color='gray')
             
             # Улучшенное оформление первого графика
             ax1.set_xlabel('Период', fontsize=12, fontweight='bold')
@@ -3192,15 +3828,10 @@ class MedicalAnalysisSystem:
             ax1.grid(True, alpha=0.3, linestyle='-', linewidth=0.5)
             ax1.set_facecolor('#FAFAFA')
             
-            plt.tight_layout(pad=3.0)
-            
-            # Встраивание графика
-            canvas = FigureCanvasTkAgg(fig, master=self.forecast_plot_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            fig.tight_layout(pad=3.0)
             
-            # Сохранение результатов
-            self.forecast_results = {
+            # Результаты передаются в главный поток для встраивания графика
+            results = {
                 'dates': forecast_dates,
                 'values': forecast_values,
                 'model': 'XGBoost',
@@ -3211,94 +3842,68 @@ class MedicalAnalysisSystem:
                                             xgb_model.feature_importances_))
             }
             
-            self.update_status(f"XGBoost прогноз построен на {periods} месяцев (MAE: {mae:.1f}, R²: {r2:.3f})")
+            status = f"XGBoost прогноз построен на {periods} месяцев (MAE: {mae:.1f}, R²: {r2:.3f})"
+            
+            return {'fig': fig, 'results': results, 'status': status}
             
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка при построении XGBoost прогноза: {str(e)}")
             import traceback
             print("Подробная ошибка XGBoost:")
             traceback.print_exc()
+            return {'error': f"Ошибка при построении XGBoost прогноза: {str(e)}"}
 
-    def forecast_linear_regression(self):
-        """Прогнозирование с использованием линейной регрессии"""
+    def forecast_linear_regression(self, periods, region_filter=None, disease_filter=None):
+        """Прогнозирование с использованием линейной регрессии (фоновый поток)"""
         if not SKLEARN_AVAILABLE:
-            messagebox.showerror("Ошибка", "Библиотека scikit-learn не установлена!")
-            return
+            return {'error': "Библиотека scikit-learn не установлена!"}
             
         try:
             # Подготовка данных
-            data = self.current_data.copy()
-            region_filter_var = getattr(self, 'forecast_region_var', None)
-            region_filter = region_filter_var.get() if hasattr(region_filter_var, 'get') else region_filter_var
-            if region_filter and region_filter != 'Все' and 'Регион' in data.columns:
-                data = data[data['Регион'] == region_filter]
-            data['Дата'] = pd.to_datetime(data['Дата'], errors='coerce')
-            data = data.dropna(subset=['Дата'])
-            monthly_data = data.resample('MS', on='Дата')['Количество'].sum()
+            monthly_data = self._prepare_monthly(region_filter)['Количество']
 
             if (monthly_data > 0).sum() < 6:
-                messagebox.showwarning("Предупреждение", "Недостаточно данных для линейной регрессии")
-                return
+                return {'warning': "Недостаточно данных для линейной регрессии"}
 
             monthly_data = monthly_data[monthly_data > 0]
             
             # Подготовка признаков (отличается от SARIMA)
-            X = np.arange(len(monthly_data)).reshape(-1, 1)
             y = monthly_data.values
             
-            # Добавляем сезонные признаки
-            months = np.array([date.month for date in monthly_data.index])
-            month_sin = np.sin(2 * np.pi * months / 12).reshape(-1, 1)
-            month_cos = np.cos(2 * np.pi * months / 12).reshape(-1, 1)
-            
-            # Объединяем все признаки
-            X_extended = np.hstack([X, month_sin, month_cos, X**2])  # Тренд + сезонность + квадратичный тренд
+            # Тренд + сезонность + квадратичный тренд, заполняются в одном массиве
+            months = monthly_data.index.month.to_numpy()
+            X_extended = _lr_design_matrix(0, months)
             
             # Разделение на обучающую и тестовую выборки
             test_size = min(0.3, 4 / len(X_extended))
             X_train, X_test, y_train, y_test = train_test_split(X_extended, y, test_size=test_size, random_state=42)
             
-            # Обучение модели
-            model = LinearRegression()
-            model.fit(X_train, y_train)
+            # Обучение модели: прямое решение МНК для четырех признаков
+            coef = _linear_fit(X_train, y_train)
             
             # Оценка качества
-            y_pred_test = model.predict(X_test)
-            mae = mean_absolute_error(y_test, y_pred_test)
-            r2 = r2_score(y_test, y_pred_test)
-            
-            # Прогноз
-            periods = self.forecast_period.get()
-            X_future = np.arange(len(monthly_data), len(monthly_data) + periods).reshape(-1, 1)
+            y_pred_test = _linear_predict(X_test, coef)
+            mae, r2 = _regression_metrics(y_test, y_pred_test)
             
             # Добавляем сезонные признаки для прогноза
-            future_months = []
             last_date = monthly_data.index[-1]
-            for i in range(periods):
-                future_date = last_date + pd.DateOffset(months=i+1)
-                future_months.append(future_date.month)
-            
-            future_months = np.array(future_months)
-            future_month_sin = np.sin(2 * np.pi * future_months / 12).reshape(-1, 1)
-            future_month_cos = np.cos(2 * np.pi * future_months / 12).reshape(-1, 1)
+            forecast_dates = pd.date_range(start=last_date + pd.offsets.MonthBegin(1), periods=periods, freq='MS')
+            future_months = forecast_dates.month.to_numpy()
             
-            X_future_extended = np.hstack([X_future, future_month_sin, future_month_cos, X_future**2])
-            forecast_values = model.predict(X_future_extended)
+            # Прогноз
+            X_future_extended = _lr_design_matrix(len(monthly_data), future_months)
+            forecast_values = _linear_predict(X_future_extended, coef)
             forecast_values = np.maximum(forecast_values, 0)  # Неотрицательные значения
             
-            # Даты прогноза
-            forecast_dates = pd.date_range(start=last_date + pd.DateOffset(months=1), 
-                                        periods=periods, freq='M')
-            
             # График
-            fig, ax1 = plt.subplots(1, 1, figsize=(12, 7))
+            fig = Figure(figsize=(12, 7))
+            ax1 = fig.subplots()
             
             # График 1: Прогноз
             ax1.plot(monthly_data.index, monthly_data.values, 
                 label='Исторические данные', marker='o', linewidth=2, color='blue')
             
             # Аппроксимация на исторических данных
-            y_fitted = model.predict(X_extended)
+            y_fitted = _linear_predict(X_extended, coef)
             ax1.plot(monthly_data.index, y_fitted, 
                 label='Линейная аппроксимация', color='green', linestyle=':', linewidth=2, alpha=0.8)
             
@@ -3319,15 +3924,10 @@ class MedicalAnalysisSystem:
             ax1.grid(True, alpha=0.3)
             
             
-            plt.tight_layout()
-            
-            # Встраивание графика
-            canvas = FigureCanvasTkAgg(fig, master=self.forecast_plot_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            fig.tight_layout()
             
-            # Сохранение результатов
-            self.forecast_results = {
+            # Результаты передаются в главный поток для встраивания графика
+            results = {
                 'dates': forecast_dates,
                 'values': forecast_values,
                 'model': 'Linear Regression',
@@ -3335,59 +3935,44 @@ class MedicalAnalysisSystem:
                 'r2': r2
             }
             
-            self.update_status(f"Прогноз Linear Regression построен на {periods} месяцев (MAE: {mae:.1f}, R²: {r2:.3f})")
+            status = f"Прогноз Linear Regression построен на {periods} месяцев (MAE: {mae:.1f}, R²: {r2:.3f})"
+            
+            return {'fig': fig, 'results': results, 'status': status}
             
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка при построении прогноза Linear Regression: {str(e)}")
+            return {'error': f"Ошибка при построении прогноза Linear Regression: {str(e)}"}
 
-    def forecast_ml(self):
-        """Прогнозирование с использованием машинного обучения"""
+    def forecast_ml(self, periods, region_filter=None, disease_filter=None):
+        """Прогнозирование с использованием машинного обучения (фоновый поток)"""
         if not SKLEARN_AVAILABLE:
-            messagebox.showerror("Ошибка", "Библиотека scikit-learn не установлена!")
-            return
+            return {'error': "Библиотека scikit-learn не установлена!"}
             
         try:
             # Подготовка данных
-            data = self.current_data.copy()
-            region_filter_var = getattr(self, 'forecast_region_var', None)
-            region_filter = region_filter_var.get() if hasattr(region_filter_var, 'get') else region_filter_var
-            if region_filter and region_filter != 'Все' and 'Регион' in data.columns:
-                data = data[data['Регион'] == region_filter]
-            disease_filter_var = getattr(self, 'forecast_disease_var', None)
-            disease_filter = disease_filter_var.get() if hasattr(disease_filter_var, 'get') else disease_filter_var
-            if disease_filter and disease_filter != 'Все' and 'Заболевание' in data.columns:
-                data = data[data['Заболевание'] == disease_filter]
-
-            # Преобразование дат
-            try:
-                data['Дата'] = pd.to_datetime(data['Дата'], errors='coerce')
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Ошибка обработки дат: {str(e)}")
-                return
-            
-            # Удаляем строки с некорректными датами
-            data = data.dropna(subset=['Дата'])
-            
-            if len(data) == 0:
-                messagebox.showerror("Ошибка", "Нет корректных данных после обработки дат")
-                return
-            
-            data['Месяц'] = data['Дата'].dt.month
-            data['Год'] = data['Дата'].dt.year
-            data['День_года'] = data['Дата'].dt.dayofyear
-            
-            # Агрегация по месяцам
-            monthly_data = data.groupby(['Год', 'Месяц'])['Количество'].sum().reset_index()
+            # Агрегация по месяцам: только месяцы, в которых есть записи
+            monthly = self._prepare_monthly(region_filter, disease_filter)
+            monthly = monthly[monthly['Записей'] > 0]
+            
+            if len(monthly) == 0:
+                return {'error': "Нет корректных данных после обработки дат"}
+            
+            monthly_data = pd.DataFrame({
+                'Дата': monthly.index,
+                'Год': monthly.index.year,
+                'Месяц': monthly.index.month,
+                'Количество': monthly['Количество'].to_numpy(),
+            })
             monthly_data['Период'] = monthly_data['Год'] * 12 + monthly_data['Месяц']
             
             if len(monthly_data) < 12:
-                messagebox.showwarning("Предупреждение", "Недостаточно данных для ML прогнозирования (нужно минимум 12 месяцев)")
-                return
+                return {'warning': "Недостаточно данных для ML прогнозирования (нужно минимум 12 месяцев)"}
             
             # Создание признаков
-            monthly_data['Лаг_1'] = monthly_data['Количество'].shift(1)
-            monthly_data['Лаг_2'] = monthly_data['Количество'].shift(2)
-            monthly_data['Скользящее_среднее'] = monthly_data['Количество'].rolling(window=3, min_periods=1).mean()
+            counts = monthly_data['Количество'].to_numpy(dtype=np.float64)
+            lags = _lag_matrix(counts, 2)
+            monthly_data['Лаг_1'] = lags[:, 0]
+            monthly_data['Лаг_2'] = lags[:, 1]
+            monthly_data['Скользящее_среднее'] = _rolling_mean(counts, 3)
             
             # Сезонные признаки
             monthly_data['Сезон_sin'] = np.sin(2 * np.pi * monthly_data['Месяц'] / 12)
@@ -3397,8 +3982,7 @@ class MedicalAnalysisSystem:
             monthly_data = monthly_data.dropna()
             
             if len(monthly_data) < 8:
-                messagebox.showwarning("Предупреждение", "Недостаточно данных после обработки для ML модели")
-                return
+                return {'warning': "Недостаточно данных после обработки для ML модели"}
             
             # Подготовка признаков и целевой переменной
             feature_columns = ['Период', 'Месяц', 'Лаг_1', 'Лаг_2', 'Скользящее_среднее', 'Сезон_sin', 'Сезон_cos']
@@ -3407,10 +3991,16 @@ class MedicalAnalysisSystem:
             
             # Разделение на обучающую и тестовую выборки
             test_size = min(0.3, 3 / len(X))  # Минимум 3 наблюдения на тест
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42, shuffle=False)
-            
-            # Обучение модели Random Forest
-            model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=10)
+            X_train, X_test, y_train, y_test = _chrono_split(X, y, test_size)
+            
+            # Обучение модели: градиентный бустинг на гистограммах признаков (бины вместо
+            # перебора порогов); min_samples_leaf уменьшен под ряды из нескольких десятков месяцев.
+            # Ранняя остановка и лист из 3 наблюдений - только на длинных рядах: на коротких
+            # они не дают сделать ни одного разбиения и вырождают модель в константу
+            model = HistGradientBoostingRegressor(max_iter=150, max_depth=5, learning_rate=0.08,
+                                                  min_samples_leaf=max(1, min(3, len(X_train) // 4)),
+                                                  early_stopping=len(X_train) >= 30,
+                                                  validation_fraction=0.2, random_state=42)
             model.fit(X_train, y_train)
             
             # Оценка качества модели
@@ -3419,29 +4009,27 @@ class MedicalAnalysisSystem:
             r2 = r2_score(y_test, y_pred)
             
             # Прогнозирование
-            periods = self.forecast_period.get()
-            forecast_values = []
-            forecast_dates = []
+            # Исторические значения и прогнозы в numpy-массивах вместо поэлементных iloc
+            q = monthly_data['Количество'].to_numpy(dtype=np.float64)
+            years = monthly_data['Год'].to_numpy(dtype=np.int32)
+            months_arr = monthly_data['Месяц'].to_numpy(dtype=np.int32)
+            forecast_out = np.empty(periods)
+            X_new = np.empty((1, len(feature_columns)))
             
             # Последние значения для построения прогноза
-            last_values = monthly_data.tail(3)
-            last_period = monthly_data['Период'].iloc[-1]
-            last_year = int(monthly_data['Год'].iloc[-1])
-            last_month = int(monthly_data['Месяц'].iloc[-1])
+            last_year = int(years[-1])
+            last_month = int(months_arr[-1])
+            last_period = last_year * 12 + last_month
+            
+            # Год и месяц каждого шага прогноза с переходом через годы
+            months_ahead = last_month - 1 + np.arange(1, periods + 1)
+            month_vec = months_ahead % 12 + 1
+            year_vec = last_year + months_ahead // 12
             
             for i in range(periods):
                 # Вычисление новой даты
                 new_period = last_period + i + 1
-                
-                # Правильный расчет года и месяца
-                months_to_add = i + 1
-                new_year = last_year
-                new_month = last_month + months_to_add
-                
-                # Корректировка для перехода через годы
-                while new_month > 12:
-                    new_month -= 12
-                    new_year += 1
+                new_month = month_vec[i]
                 
                 # Сезонные признаки
                 season_sin = np.sin(2 * np.pi * new_month / 12)
@@ -3449,110 +4037,58 @@ class MedicalAnalysisSystem:
                 
                 # Лаговые признаки
                 if i == 0:
-                    lag_1 = monthly_data['Количество'].iloc[-1]
-                    lag_2 = monthly_data['Количество'].iloc[-2] if len(monthly_data) > 1 else lag_1
-                    moving_avg = monthly_data['Количество'].iloc[-3:].mean() if len(monthly_data) > 2 else lag_1
+                    lag_1 = q[-1]
+                    lag_2 = q[-2] if len(q) > 1 else lag_1
+                    moving_avg = q[-3:].mean() if len(q) > 2 else lag_1
                 elif i == 1:
-                    lag_1 = forecast_values[0]
-                    lag_2 = monthly_data['Количество'].iloc[-1]
-                    moving_avg = np.mean([monthly_data['Количество'].iloc[-2], monthly_data['Количество'].iloc[-1], forecast_values[0]])
+                    lag_1 = forecast_out[0]
+                    lag_2 = q[-1]
+                    moving_avg = (q[-2] + q[-1] + forecast_out[0]) / 3
                 else:
-                    lag_1 = forecast_values[i-1]
-                    lag_2 = forecast_values[i-2] if i > 1 else monthly_data['Количество'].iloc[-1]
-                    if i >= 2:
-                        moving_avg = np.mean(forecast_values[i-3:i])
-                    else:
-                        moving_avg = np.mean([monthly_data['Количество'].iloc[-1]] + forecast_values[:i])
+                    lag_1 = forecast_out[i - 1]
+                    lag_2 = forecast_out[i - 2]
+                    # На третьем шаге среднее берется только по последнему прогнозу
+                    moving_avg = forecast_out[i - 3:i].mean() if i > 2 else forecast_out[1]
                 
-                # Создание вектора признаков
-                X_new = np.array([[new_period, new_month, lag_1, lag_2, moving_avg, season_sin, season_cos]])
+                # Вектор признаков заполняется в одном буфере
+                X_new[0] = (new_period, new_month, lag_1, lag_2, moving_avg, season_sin, season_cos)
                 
                 # Прогноз
-                forecast_value = max(0, model.predict(X_new)[0])
-                forecast_values.append(forecast_value)
-                
-                # Создание дат прогноза
-                try:
-                    # Проверяем корректность года и месяца
-                    if 1 <= new_month <= 12 and 1900 <= new_year <= 2100:
-                        forecast_date = pd.Timestamp(year=new_year, month=new_month, day=1)
-                    else:
-                        # Fallback: используем последнюю дату + offset
-                        last_date = pd.Timestamp(year=last_year, month=last_month, day=1)
-                        forecast_date = last_date + pd.DateOffset(months=months_to_add)
-                    
-                    forecast_dates.append(forecast_date)
-                    
-                except (ValueError, OverflowError) as e:
-                    # Дополнительный fallback
-                    print(f"Ошибка создания даты для {new_year}-{new_month}: {e}")
-                    last_date = pd.Timestamp(year=last_year, month=last_month, day=1)
-                    forecast_date = last_date + pd.DateOffset(months=months_to_add)
-                    forecast_dates.append(forecast_date)
+                forecast_out[i] = max(0, model.predict(X_new)[0])
+            forecast_values = forecast_out.tolist()
+            
+            # Даты прогноза одним векторным вызовом
+            forecast_dates = pd.DatetimeIndex(pd.to_datetime(
+                {'year': year_vec, 'month': month_vec, 'day': 1}, errors='coerce'))
             
             # Настройка matplotlib для корректного отображения
             # Создание графика
-            fig, ax1 = plt.subplots(figsize=(12, 7))
+            fig = Figure(figsize=(12, 7))
+            ax1 = fig.subplots()
             
             # График 1: Прогноз
-            # Создание исторических дат
-            try:
-                historical_dates = []
-                for _, row in monthly_data.iterrows():
-                    try:
-                        year = int(row['Год'])
-                        month = int(row['Месяц'])
-                        if 1 <= month <= 12 and 1900 <= year <= 2100:
-                            date = pd.Timestamp(year=year, month=month, day=1)
-                            historical_dates.append(date)
-                        else:
-                            # Пропускаем некорректные даты
-                            continue
-                    except (ValueError, TypeError):
-                        continue
-                
-                if len(historical_dates) > 0:
-                    # Берем соответствующие значения для корректных дат
-                    valid_values = monthly_data['Количество'].iloc[:len(historical_dates)]
-                    
-                    ax1.plot(historical_dates, valid_values, 
-                            label='📊 Исторические данные', marker='o', linewidth=2.5, 
-                            color='#2E86AB', markersize=6, alpha=0.8)
-                    
-                    # Прогноз
-                    if forecast_dates and forecast_values:
-                        ax1.plot(forecast_dates, forecast_values, 
-                                label='🚀 Прогноз Random Forest', color='#E74C3C', marker='s', 
-                                linestyle='--', linewidth=3, markersize=7, alpha=0.9)
-                        
-                        # Добавляем вертикальную линию разделения
-                        if historical_dates and forecast_dates:
-                            ax1.axvline(x=historical_dates[-1], color='gray', linestyle=':', alpha=0.7, linewidth=2)
-                            ax1.text(historical_dates[-1], ax1.get_ylim()[1]*0.9, ' Прогноз начинается здесь', 
-                                    rotation=90, verticalalignment='top', fontsize=10, color='gray')
-                else:
-                    # Fallback к числовым индексам
-                    ax1.plot(range(len(monthly_data)), monthly_data['Количество'], 
-                            label='📊 Исторические данные', marker='o', linewidth=2.5, color='#2E86AB')
-                    if forecast_values:
-                        forecast_start = len(monthly_data)
-                        ax1.plot(range(forecast_start, forecast_start + len(forecast_values)), forecast_values, 
-                                label='🚀 Прогноз Random Forest', color='#E74C3C', marker='s', linestyle='--', linewidth=3)
+            # Начала месяцев истории уже есть в столбце 'Дата'
+            historical_dates = monthly_data['Дата']
+            ax1.plot(historical_dates, monthly_data['Количество'], 
+                    label='📊 Исторические данные', marker='o', linewidth=2.5, 
+                    color='#2E86AB', markersize=6, alpha=0.8)
             
-            except Exception as e:
-                print(f"Ошибка при создании графика дат: {e}")
-                # Простой fallback
-                ax1.plot(range(len(monthly_data)), monthly_data['Количество'], 
-                        label='📊 Исторические данные', marker='o', linewidth=2.5, color='#2E86AB')
-                if forecast_values:
-                    forecast_start = len(monthly_data)
-                    ax1.plot(range(forecast_start, forecast_start + len(forecast_values)), forecast_values, 
-                            label='🚀 Прогноз Random Forest', color='#E74C3C', marker='s', linestyle='--', linewidth=3)
+            # Прогноз
+            if len(forecast_dates) and forecast_values:
+                ax1.plot(forecast_dates, forecast_values, 
+                        label='🚀 Прогноз ML (Gradient Boosting)', color='#E74C3C', marker='s', 
+                        linestyle='--', linewidth=3, markersize=7, alpha=0.9)
+                
+                # Добавляем вертикальную линию разделения
+                last_history_date = historical_dates.iloc[-1]
+                ax1.axvline(x=last_history_date, color='gray', linestyle=':', alpha=0.7, linewidth=2)
+                ax1.text(last_history_date, ax1.get_ylim()[1]*0.9, ' Прогноз начинается здесь', 
+                        rotation=90, verticalalignment='top', fontsize=10, color='gray')
             
             # Улучшенное оформление первого графика
             ax1.set_xlabel('Период', fontsize=12, fontweight='bold')
             ax1.set_ylabel('Количество случаев', fontsize=12, fontweight='bold')
-            ax1.set_title(f'🎯 Random Forest: Прогноз заболеваемости на {periods} месяцев\n'
+            ax1.set_title(f'🎯 ML (Gradient Boosting): Прогноз заболеваемости на {periods} месяцев\n'
                         f'Точность: R² = {r2:.3f} | Ошибка: MAE = {mae:.1f}', 
                         fontsize=14, fontweight='bold', pad=20)
             ax1.legend(loc='upper left', frameon=True, fancybox=True, shadow=True, fontsize=11)
@@ -3560,74 +4096,27 @@ class MedicalAnalysisSystem:
             ax1.set_facecolor('#FAFAFA')
             
             # Общее улучшение дизайна
-            plt.tight_layout(pad=3.0)
+            fig.tight_layout(pad=3.0)
             
-            # Встраивание графика
-            canvas = FigureCanvasTkAgg(fig, master=self.forecast_plot_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            
-            # Сохранение результатов
-            self.forecast_results = {
+            # Результаты передаются в главный поток для встраивания графика
+            results = {
                 'dates': forecast_dates,
                 'values': forecast_values,
-                'model': 'Random Forest',
+                'model': 'ML (Gradient Boosting)',
                 'mae': mae,
                 'r2': r2
             }
             
-            self.update_status(f"ML прогноз построен на {periods} месяцев (MAE: {mae:.1f}, R²: {r2:.3f})")
+            status = f"ML прогноз построен на {periods} месяцев (MAE: {mae:.1f}, R²: {r2:.3f})"
+            
+            return {'fig': fig, 'results': results, 'status': status}
             
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Ошибка при построении ML прогноза: {str(e)}")
             # Показываем подробную ошибку для отладки
             import traceback
-            print("Подробная ошибка Random Forest:")
+            print("Подробная ошибка ML (Gradient Boosting):")
             traceback.print_exc()
-
-    def _plot_feature_importance_enhanced(self, ax, model):
-        """Вспомогательный метод для отрисовки улучшенной важности признаков"""
-        feature_importance = model.feature_importances_
-        feature_names = ['Период', 'Месяц', 'Лаг 1', 'Лаг 2', 'Скольз. ср.', 'Сезон sin', 'Сезон cos']
-        
-        # Сортируем по важности
-        importance_data = list(zip(feature_names, feature_importance))
-        importance_data.sort(key=lambda x: x[1], reverse=True)
-        sorted_names, sorted_importance = zip(*importance_data)
-        
-        # Создаем градиентную цветовую схему
-        colors = plt.cm.viridis(np.linspace(0.2, 0.9, len(sorted_names)))
-        
-        # Горизонтальная диаграмма с улучшенным дизайном
-        bars = ax.barh(range(len(sorted_names)), sorted_importance, 
-                    color=colors, alpha=0.8, edgecolor='white', linewidth=2)
-        
-        # Добавляем значения и проценты
-        for i, (bar, importance) in enumerate(zip(bars, sorted_importance)):
-            percentage = importance * 100
-            ax.text(bar.get_width() + max(sorted_importance)*0.01, 
-                    bar.get_y() + bar.get_height()/2, 
-                    f'{percentage:.1f}%', ha='left', va='center', 
-                    fontsize=11, fontweight='bold', color='darkblue')
-            
-            # Добавляем ранг
-            ax.text(-max(sorted_importance)*0.02, bar.get_y() + bar.get_height()/2, 
-                    f'#{i+1}', ha='right', va='center', 
-                    fontsize=10, fontweight='bold', color='darkred')
-        
-        ax.set_yticks(range(len(sorted_names)))
-        ax.set_yticklabels(sorted_names, fontsize=11)
-        ax.set_xlabel('Важность признака', fontsize=12, fontweight='bold')
-        ax.set_title('🏆 Рейтинг важности признаков (Random Forest)', fontsize=14, fontweight='bold')
-        ax.grid(True, axis='x', alpha=0.3, linestyle='--')
-        ax.set_xlim(-max(sorted_importance)*0.05, max(sorted_importance) * 1.2)
-        
-        # Добавляем анализ важности
-        top_3_sum = sum(sorted_importance[:3])
-        stats_text = f'Анализ важности:\nТоп-3 признака: {top_3_sum*100:.1f}%\nДоминирующий: {sorted_names[0]}\nВсего признаков: {len(sorted_names)}'
-        ax.text(0.98, 0.02, stats_text, transform=ax.transAxes, fontsize=10,
-                verticalalignment='bottom', horizontalalignment='right',
-                bbox=dict(boxstyle='round,pad=0.5', facecolor='lightgreen', alpha=0.8))
+            return {'error': f"Ошибка при построении ML прогноза: {str(e)}"}
 
     def save_results(self):
         """Сохранение результатов анализа"""
@@ -3635,19 +4124,29 @@ class MedicalAnalysisSystem:
             messagebox.showwarning("Предупреждение", "Нет данных для сохранения!")
             return
             
+        filetypes = [("CSV файлы", "*.csv"), ("Excel файлы", "*.xlsx")]
+        if PYARROW_AVAILABLE:
+            # Колоночные форматы пишутся без посимвольной сериализации ячеек
+            filetypes = [("Parquet файлы", "*.parquet"), ("Feather файлы", "*.feather")] + filetypes
+        
         filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV файлы", "*.csv"), ("Excel файлы", "*.xlsx")],
+            filetypes=filetypes,
             title="Сохранить результаты анализа"
         )
         
         if filename:
             try:
                 # Выбираем данные для сохранения
-                data_to_save = self.processed_data if self.processed_data is not None else self.current_data
+                data_to_save = self._data_for_export()
                 
                 if filename.endswith('.csv'):
                     data_to_save.to_csv(filename, index=False, encoding='utf-8')
+                elif filename.endswith('.parquet'):
+                    data_to_save.to_parquet(filename, engine='pyarrow', compression='snappy', index=False)
+                elif filename.endswith('.feather'):
+                    # Feather требует RangeIndex
+                    data_to_save.reset_index(drop=True).to_feather(filename)
                 else:
                     data_to_save.to_excel(filename, index=False)
                     
@@ -3663,35 +4162,44 @@ class MedicalAnalysisSystem:
             messagebox.showwarning("Предупреждение", "Нет данных для создания отчета!")
             return
             
-        report_type = self.report_type.get()
-        
-        # Разблокируем текстовое поле
-        self.report_text.config(state=tk.NORMAL)
-        self.report_text.delete(1.0, tk.END)
+        # Генерация отчета в зависимости от типа
+        builders = {
+            "summary": self.generate_summary_report,
+            "detailed": self.generate_detailed_report,
+            "forecast": self.generate_forecast_report,
+            "comparative": self.generate_comparative_report,
+        }
+        builder = builders.get(self.report_type.get())
+        if builder is None:
+            return
         
+        # Группировки и сборка текста - в фоновом потоке, виджет обновляется из главного
+        self.update_status("Формируется отчет...")
+        future = self._report_executor.submit(builder)
+        self.root.after(50, self._poll_report, future)
+
+    def _poll_report(self, future):
+        """Ожидание фонового отчета без блокировки главного цикла Tk"""
+        if not future.done():
+            self.root.after(50, self._poll_report, future)
+            return
         try:
-            # Генерация отчета в зависимости от типа
-            if report_type == "summary":
-                self.generate_summary_report()
-            elif report_type == "detailed":
-                self.generate_detailed_report()
-            elif report_type == "forecast":
-                self.generate_forecast_report()
-            elif report_type == "comparative":
-                self.generate_comparative_report()
-                
+            report, status = future.result()
         except Exception as e:
-            error_text = f"Ошибка при создании отчета: {str(e)}"
-            self.report_text.insert(1.0, error_text)
+            report, status = f"Ошибка при создании отчета: {str(e)}", None
         
-        finally:
-            # Блокируем текстовое поле
-            self.report_text.config(state=tk.DISABLED)
+        # Разблокируем текстовое поле, заменяем содержимое одной командой Tk и блокируем снова
+        self.report_text.config(state=tk.NORMAL)
+        self.report_text.replace(1.0, tk.END, report)
+        self.report_text.config(state=tk.DISABLED)
+        self._last_report = report
+        if status:
+            self.update_status(status)
 
     def generate_summary_report(self):
-        """Генерация сводного отчета"""
+        """Генерация сводного отчета (фоновый поток, возвращает текст и статус)"""
         try:
-            report = f"""
+            parts = [f"""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                         СРАВНИТЕЛЬНЫЙ ОТЧЕТ                                  ║
 ║                       ЗАБОЛЕВАЕМОСТЬ НАСЕЛЕНИЯ РК                            ║
@@ -3700,27 +4208,30 @@ class MedicalAnalysisSystem:
 📅 Дата создания: {datetime.now().strftime('%d.%m.%Y %H:%M')}
 
 1. СРАВНЕНИЕ ПО РЕГИОНАМ - Топ-10 регионов по заболеваемости
-"""
+"""]
             
             # Рейтинг регионов
-            regional_totals = self.current_data.groupby('Регион')['Количество'].sum().sort_values(ascending=False)
+            regional_totals = self._get_region_totals()
+            grand_total = self._get_grand_total()
             
-            for i, (region, total) in enumerate(regional_totals.head(10).items(), 1):
-                percentage = (total / self.current_data['Количество'].sum()) * 100
+            top_regions = regional_totals.nlargest(10)
+            shares = top_regions / grand_total * 100
+            for i, (region, total, percentage) in enumerate(zip(top_regions.index, top_regions, shares), 1):
                 medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "📊"
-                report += f"\n{medal} {i:2d}. {region:<20} {total:>8,.0f} ({percentage:5.1f}%)"
+                parts.append(f"\n{medal} {i:2d}. {region:<20} {total:>8,.0f} ({percentage:5.1f}%)")
 
-            self.report_text.insert(1.0, report)
-            self.update_status("Сравнительный отчет создан успешно")
+            return "".join(parts), "Сравнительный отчет создан успешно"
             
         except Exception as e:
                     error_text = f"Ошибка при создании сводного отчета: {str(e)}"
-                    self.report_text.insert(1.0, error_text)
+                    return error_text, None
 
     def generate_summary_report(self):
-        """Генерация сводного отчета"""
+        """Генерация сводного отчета (фоновый поток, возвращает текст и статус)"""
         try:
-            report = f"""
+            # Общее число случаев считается один раз для всех процентов отчета
+            grand_total = self._get_grand_total()
+            parts = [f"""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                  СВОДНЫЙ ОТЧЕТ ПО ЗАБОЛЕВАЕМОСТИ НАСЕЛЕНИЯ                   ║
 ║                              РЕСПУБЛИКА КАЗАХСТАН                            ║
@@ -3733,7 +4244,7 @@ class MedicalAnalysisSystem:
 ══════════════════════════════════════════════════════════════════════════════
 
 🗓️  Период анализа: {self.current_data['Дата'].min()} — {self.current_data['Дата'].max()}
-📈  Общее количество случаев: {self.current_data['Количество'].sum():,}
+📈  Общее количество случаев: {grand_total:,}
 🏥  Количество записей: {len(self.current_data):,}
 🌍  Количество регионов: {self.current_data['Регион'].nunique()}
 💊  Типов заболеваний: {self.current_data['Заболевание'].nunique()}
@@ -3741,62 +4252,60 @@ class MedicalAnalysisSystem:
 ══════════════════════════════════════════════════════════════════════════════
                          2. СТАТИСТИКА ПО ЗАБОЛЕВАНИЯМ
 ══════════════════════════════════════════════════════════════════════════════
-"""
+"""]
             # Статистика по заболеваниям
-            disease_stats = self.current_data.groupby('Заболевание')['Количество'].agg(['sum', 'mean', 'std']).round(1)
+            disease_stats = self.current_data.groupby('Заболевание', observed=True)['Количество'].agg(['sum', 'mean', 'std']).round(1)
             
-            for disease, stats in disease_stats.iterrows():
-                report += f"""
+            # Колонки агрегата как массивы: без построения Series на каждую строку
+            for disease, total, mean, std in zip(disease_stats.index, disease_stats['sum'].to_numpy(),
+                                                 disease_stats['mean'].to_numpy(), disease_stats['std'].to_numpy()):
+                parts.append(f"""
 📍 {disease}:
-   • Всего случаев: {stats['sum']:,.0f}
-   • Среднее в месяц: {stats['mean']:,.1f}
-   • Стандартное отклонение: {stats['std']:,.1f}"""
+   • Всего случаев: {total:,.0f}
+   • Среднее в месяц: {mean:,.1f}
+   • Стандартное отклонение: {std:,.1f}""")
             
-            report += f"""
+            parts.append(f"""
 
 ══════════════════════════════════════════════════════════════════════════════
                          3. ТОП-5 РЕГИОНОВ ПО ЗАБОЛЕВАЕМОСТИ
 ══════════════════════════════════════════════════════════════════════════════
-"""
-            top_regions = self.current_data.groupby('Регион')['Количество'].sum().sort_values(ascending=False).head(5)
-            for i, (region, count) in enumerate(top_regions.items(), 1):
+""")
+            top_regions = self._get_region_totals().nlargest(5)
+            # Доли всех строк раздела одним векторным делением
+            shares = top_regions / grand_total * 100
+            for i, (region, count, percentage) in enumerate(zip(top_regions.index, top_regions, shares), 1):
                 medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "🏅"
-                percentage = (count / self.current_data['Количество'].sum()) * 100
-                report += f"\n{medal} {i}. {region}: {count:,} случаев ({percentage:.1f}%)"
+                parts.append(f"\n{medal} {i}. {region}: {count:,} случаев ({percentage:.1f}%)")
             
             # Возрастное распределение (если есть данные)
             if 'Возраст' in self.current_data.columns:
-                report += f"""
+                parts.append(f"""
 
 ══════════════════════════════════════════════════════════════════════════════
                             4. ВОЗРАСТНОЕ РАСПРЕДЕЛЕНИЕ
 ══════════════════════════════════════════════════════════════════════════════
-"""
-                age_bins = pd.cut(self.current_data['Возраст'], bins=[0, 14, 30, 45, 60, 100], 
-                                 labels=['0-14 лет', '15-30 лет', '31-45 лет', '46-60 лет', '60+ лет'])
-                age_dist = self.current_data.groupby(age_bins)['Количество'].sum()
+""")
+                age_dist = self.current_data.groupby(self._get_age_groups(), observed=True)['Количество'].sum()
                 
-                for age_group, count in age_dist.items():
-                    percentage = (count / self.current_data['Количество'].sum()) * 100
-                    report += f"\n👥 {age_group}: {count:,} случаев ({percentage:.1f}%)"
+                for age_group, count, percentage in zip(age_dist.index, age_dist, age_dist / grand_total * 100):
+                    parts.append(f"\n👥 {age_group} лет: {count:,} случаев ({percentage:.1f}%)")
             
             # Сезонный анализ
-            report += f"""
+            parts.append(f"""
 
 ══════════════════════════════════════════════════════════════════════════════
                                5. СЕЗОННЫЙ АНАЛИЗ
 ══════════════════════════════════════════════════════════════════════════════
-"""
-            self.current_data['Дата_dt'] = pd.to_datetime(self.current_data['Дата'])
+""")
             seasonal_data = self.current_data.groupby(self.current_data['Дата_dt'].dt.quarter)['Количество'].sum()
             seasons = {1: 'I квартал (зима-весна)', 2: 'II квартал (весна-лето)', 
                       3: 'III квартал (лето-осень)', 4: 'IV квартал (осень-зима)'}
             
-            for quarter, count in seasonal_data.items():
-                percentage = (count / self.current_data['Количество'].sum()) * 100
-                report += f"\n🗓️  {seasons[quarter]}: {count:,} случаев ({percentage:.1f}%)"
+            for quarter, count, percentage in zip(seasonal_data.index, seasonal_data, seasonal_data / grand_total * 100):
+                parts.append(f"\n🗓️  {seasons[quarter]}: {count:,} случаев ({percentage:.1f}%)")
             
-            report += f"""
+            parts.append(f"""
 
 ══════════════════════════════════════════════════════════════════════════════
                                 6. РЕКОМЕНДАЦИИ
@@ -3804,7 +4313,7 @@ class MedicalAnalysisSystem:
 
 🔍 Основные выводы:
 • Наибольшая заболеваемость зафиксирована в регионе: {top_regions.index[0]}
-• Доминирующее заболевание: {disease_stats.sort_values('sum', ascending=False).index[0]}
+• Доминирующее заболевание: {disease_stats['sum'].idxmax()}
 • Пиковый сезон: {seasons[seasonal_data.idxmax()]}
 
 💡 Рекомендации:
@@ -3812,19 +4321,18 @@ class MedicalAnalysisSystem:
 • Подготовиться к сезонному росту заболеваемости
 • Провести дополнительный анализ факторов риска
 
-            """
+            """)
             
-            self.report_text.insert(1.0, report)
-            self.update_status("Сводный отчет создан успешно")
+            return "".join(parts), "Сводный отчет создан успешно"
             
         except Exception as e:
             error_text = f"Ошибка при создании сводного отчета: {str(e)}"
-            self.report_text.insert(1.0, error_text)
+            return error_text, None
 
     def generate_detailed_report(self):
-        """Генерация детального отчета"""
+        """Генерация детального отчета (фоновый поток, возвращает текст и статус)"""
         try:
-            report = f"""
+            parts = [f"""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                  ДЕТАЛЬНЫЙ ОТЧЕТ ПО ЗАБОЛЕВАЕМОСТИ НАСЕЛЕНИЯ                 ║
 ║                              РЕСПУБЛИКА КАЗАХСТАН                            ║
@@ -3835,51 +4343,53 @@ class MedicalAnalysisSystem:
 ══════════════════════════════════════════════════════════════════════════════
                                1. ПОМЕСЯЧНАЯ ДИНАМИКА
 ══════════════════════════════════════════════════════════════════════════════
-"""
+"""]
             # Помесячная статистика
-            self.current_data['Дата_dt'] = pd.to_datetime(self.current_data['Дата'])
             monthly_stats = self.current_data.groupby(self.current_data['Дата_dt'].dt.to_period('M'))['Количество'].sum()
             
             for period, count in monthly_stats.items():
-                report += f"\n📊 {period}: {count:,} случаев"
+                parts.append(f"\n📊 {period}: {count:,} случаев")
                 
-            report += f"""
+            parts.append(f"""
 
 ══════════════════════════════════════════════════════════════════════════════
                               2. РЕГИОНАЛЬНЫЙ АНАЛИЗ
 ══════════════════════════════════════════════════════════════════════════════
-"""
-            # Детальная статистика по регионам
-            for region in sorted(self.current_data['Регион'].unique()):
-                region_data = self.current_data[self.current_data['Регион'] == region]
-                total_cases = region_data['Количество'].sum()
-                
-                report += f"""
+""")
+            # Детальная статистика по регионам: все показатели одним проходом группировки
+            data = self.current_data
+            region_stats = data.groupby('Регион', observed=True).agg(
+                total=('Количество', 'sum'), records=('Количество', 'size'),
+                date_min=('Дата', 'min'), date_max=('Дата', 'max'))
+            disease_by_region = data.groupby(['Регион', 'Заболевание'], observed=True)['Количество'].sum()
+            
+            # Группировка уже упорядочена по региону
+            for region, total_cases, records, date_min, date_max in region_stats.itertuples():
+                parts.append(f"""
 
 🏥 {region}:
    📈 Всего случаев: {total_cases:,}
-   📊 Записей: {len(region_data):,}
-   🗓️  Период: {region_data['Дата'].min()} — {region_data['Дата'].max()}"""
+   📊 Записей: {records:,}
+   🗓️  Период: {date_min} — {date_max}""")
                 
                 # Топ заболевания в регионе
-                top_diseases = region_data.groupby('Заболевание')['Количество'].sum().sort_values(ascending=False).head(3)
-                report += "\n   💊 Основные заболевания:"
-                for j, (disease, count) in enumerate(top_diseases.items(), 1):
-                    percentage = (count / total_cases) * 100
-                    report += f"\n      {j}. {disease}: {count:,} ({percentage:.1f}%)"
+                top_diseases = disease_by_region.loc[region].nlargest(3)
+                parts.append("\n   💊 Основные заболевания:")
+                shares = top_diseases / total_cases * 100
+                for j, (disease, count, percentage) in enumerate(zip(top_diseases.index, top_diseases, shares), 1):
+                    parts.append(f"\n      {j}. {disease}: {count:,} ({percentage:.1f}%)")
             
-            self.report_text.insert(1.0, report)
-            self.update_status("Детальный отчет создан успешно")
+            return "".join(parts), "Детальный отчет создан успешно"
             
         except Exception as e:
             error_text = f"Ошибка при создании детального отчета: {str(e)}"
-            self.report_text.insert(1.0, error_text)
+            return error_text, None
 
     def generate_forecast_report(self):
-        """Генерация прогнозного отчета"""
+        """Генерация прогнозного отчета (фоновый поток, возвращает текст и статус)"""
         try:
             if self.forecast_results is None:
-                report = """
+                parts = ["""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                          ПРОГНОЗНЫЙ ОТЧЕТ                                    ║
 ╚══════════════════════════════════════════════════════════════════════════════╝
@@ -3892,13 +4402,13 @@ class MedicalAnalysisSystem:
 3. Настройте параметры
 4. Нажмите "Построить прогноз"
 5. Вернитесь к созданию отчета
-                """
+                """]
             else:
                 model_name = self.forecast_results.get('model', 'Неизвестная')
                 dates = self.forecast_results['dates']
                 values = self.forecast_results['values']
                 
-                report = f"""
+                parts = [f"""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                          ПРОГНОЗНЫЙ ОТЧЕТ                                    ║
 ║                       ЗАБОЛЕВАЕМОСТЬ НАСЕЛЕНИЯ РК                            ║
@@ -3913,39 +4423,38 @@ class MedicalAnalysisSystem:
 
 🎯 Модель: {model_name}
 📊 Период прогноза: {len(values)} месяцев
-🗓️  Прогнозный период: {dates[0].strftime('%Y-%m')} — {dates[-1].strftime('%Y-%m')}"""
+🗓️  Прогнозный период: {dates[0].strftime('%Y-%m')} — {dates[-1].strftime('%Y-%m')}"""]
 
                 # Добавляем метрики качества если есть
                 if 'r2' in self.forecast_results:
                     r2 = self.forecast_results['r2']
-                    report += f"\n📈 Коэффициент детерминации (R²): {r2:.3f}"
+                    parts.append(f"\n📈 Коэффициент детерминации (R²): {r2:.3f}")
                     
                 if 'mae' in self.forecast_results:
                     mae = self.forecast_results['mae']
-                    report += f"\n📉 Средняя абсолютная ошибка: {mae:.0f}"
+                    parts.append(f"\n📉 Средняя абсолютная ошибка: {mae:.0f}")
 
-                report += f"""
+                parts.append(f"""
 
 ══════════════════════════════════════════════════════════════════════════════
                               2. ПРОГНОЗНЫЕ ЗНАЧЕНИЯ
 ══════════════════════════════════════════════════════════════════════════════
-"""
+""")
                 
                 # Прогнозные значения по месяцам
                 for date, value in zip(dates, values):
-                    report += f"\n📅 {date.strftime('%Y-%m')}: {value:,.0f} случаев"
+                    parts.append(f"\n📅 {date.strftime('%Y-%m')}: {value:,.0f} случаев")
             
-            self.report_text.insert(1.0, report)
-            self.update_status("Прогнозный отчет создан успешно")
+            return "".join(parts), "Прогнозный отчет создан успешно"
             
         except Exception as e:
             error_text = f"Ошибка при создании прогнозного отчета: {str(e)}"
-            self.report_text.insert(1.0, error_text)
+            return error_text, None
 
     def generate_comparative_report(self):
-            """Генерация сравнительного отчета"""
+            """Генерация сравнительного отчета (фоновый поток, возвращает текст и статус)"""
             try:
-                report = f"""
+                parts = [f"""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║                         СРАВНИТЕЛЬНЫЙ ОТЧЕТ                                  ║
 ║                       ЗАБОЛЕВАЕМОСТЬ НАСЕЛЕНИЯ РК                            ║
@@ -3954,26 +4463,29 @@ class MedicalAnalysisSystem:
     📅 Дата создания: {datetime.now().strftime('%d.%m.%Y %H:%M')}
 
                 1. СРАВНЕНИЕ ПО РЕГИОНАМ - Топ-10 регионов по заболеваемости
-                """
+                """]
                 
                 # Рейтинг регионов
-                regional_totals = self.current_data.groupby('Регион')['Количество'].sum().sort_values(ascending=False)
+                regional_totals = self._get_region_totals()
+                grand_total = self._get_grand_total()
                 
-                for i, (region, total) in enumerate(regional_totals.head(10).items(), 1):
-                    percentage = (total / self.current_data['Количество'].sum()) * 100
+                top_regions = regional_totals.nlargest(10)
+                shares = top_regions / grand_total * 100
+                for i, (region, total, percentage) in enumerate(zip(top_regions.index, top_regions, shares), 1):
                     medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "📊"
-                    report += f"\n{medal} {i:2d}. {region:<20} {total:>8,.0f} ({percentage:5.1f}%)"
+                    parts.append(f"\n{medal} {i:2d}. {region:<20} {total:>8,.0f} ({percentage:5.1f}%)")
 
-                self.report_text.insert(1.0, report)
-                self.update_status("Сравнительный отчет создан успешно")
+                return "".join(parts), "Сравнительный отчет создан успешно"
                 
             except Exception as e:
                 error_text = f"Ошибка при создании сравнительного отчета: {str(e)}"
-                self.report_text.insert(1.0, error_text)
+                return error_text, None
 
     def export_report(self):
         """Экспорт отчета"""
-        content = self.report_text.get(1.0, tk.END).strip()
+        # Текст виджета нужен только до первого отчета (приветственная страница)
+        content = self._last_report if self._last_report is not None else self.report_text.get(1.0, tk.END)
+        content = content.strip()
         if not content:
             messagebox.showwarning("Предупреждение", "Нет отчета для экспорта!")
             return
@@ -4009,90 +4521,12 @@ class MedicalAnalysisSystem:
             return
             
         try:
-            html_content = f"""
-<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Медицинский отчет - Система анализа заболеваний РК</title>
-    <style>
-        body {{
-            font-family: 'Courier New', monospace;
-            line-height: 1.6;
-            margin: 0;
-            padding: 20px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            padding: 30px;
-            border-radius: 15px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        }}
-        .header {{
-            text-align: center;
-            border-bottom: 3px solid #3498db;
-            padding-bottom: 20px;
-            margin-bottom: 30px;
-        }}
-        .header h1 {{
-            color: #2c3e50;
-            margin: 0;
-            font-size: 24px;
-        }}
-        .header .subtitle {{
-            color: #7f8c8d;
-            margin-top: 10px;
-        }}
-        pre {{
-            background-color: #f8f9fa;
-            padding: 20px;
-            border-radius: 8px;
-            border-left: 4px solid #3498db;
-            white-space: pre-wrap;
-            font-family: 'Courier New', monospace;
-            overflow-x: auto;
-            font-size: 12px;
-            line-height: 1.4;
-        }}
-        .footer {{
-            text-align: center;
-            margin-top: 30px;
-            padding-top: 20px;
-            border-top: 1px solid #ecf0f1;
-            font-size: 12px;
-            color: #7f8c8d;
-        }}
-        @media print {{
-            body {{ background: white; }}
-            .container {{ box-shadow: none; }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>📊 Отчет системы анализа заболеваний</h1>
-            <div class="subtitle">Республика Казахстан • Министерство здравоохранения</div>
-            <div class="subtitle">Создано: {datetime.now().strftime('%d.%m.%Y в %H:%M')}</div>
-        </div>
-        
-        <pre>{content}</pre>
-        
-        <div class="footer">
-            <p><strong>Система анализа заболеваний населения РК</strong></p>
-            <p><em>Данный отчет сформирован автоматически и требует профессиональной интерпретации</em></p>
-        </div>
-    </div>
-</body>
-</html>
-            """
+            html_content = _HTML_TEMPLATE.substitute(
+                content=html.escape(content, quote=False),
+                created=datetime.now().strftime('%d.%m.%Y в %H:%M'),
+            )
             
-            with open(filename, 'w', encoding='utf-8') as f:
+            with open(filename, 'w', encoding='utf-8', buffering=_EXPORT_BUFFER_SIZE) as f:
                 f.write(html_content)
             
             messagebox.showinfo("Успех", f"HTML отчет сохранен: {os.path.basename(filename)}")
@@ -4100,7 +4534,9 @@ class MedicalAnalysisSystem:
             # Предлагаем открыть файл
             response = messagebox.askyesno("Открыть файл", "Открыть созданный HTML файл в браузере?")
             if response:
-                webbrowser.open('file://' + os.path.abspath(filename))
+                # Корректный file:// URI и для путей с буквой диска; запуск браузера не блокирует Tk
+                uri = Path(filename).resolve().as_uri()
+                threading.Thread(target=webbrowser.open, args=(uri,), daemon=True).start()
                 
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка при создании HTML файла: {str(e)}")
@@ -4121,13 +4557,10 @@ class MedicalAnalysisSystem:
             pdf.add_page()
             pdf.add_font('Arial', '', 'C:\\Windows\\Fonts\\arial.ttf', uni=True)
             pdf.set_font('Arial', size=12)
-            for line in content.splitlines():
-                clean_line = (
-                    line.replace("═", "=")
-                    .replace("║", "|")
-                )
-                clean_line = "".join(ch for ch in clean_line if ord(ch) <= 0xFFFF)
-                pdf.multi_cell(0, 10, txt=clean_line)
+            # Очистка всего текста за два прохода вместо посимвольного генератора на каждой строке
+            clean_content = _NON_BMP_CHARS.sub('', content.translate(_BOX_CHARS_TABLE))
+            for line in clean_content.splitlines():
+                pdf.multi_cell(0, 10, txt=line)
             pdf.output(filename)
             messagebox.showinfo("Успех", f"PDF отчет сохранен: {os.path.basename(filename)}")
 
@@ -4161,17 +4594,14 @@ class MedicalAnalysisSystem:
                 worksheet['A2'] = f"Дата создания: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
                 worksheet['A2'].font = Font(size=12)
                 
-                # Содержание отчета
-                lines = content.split('\n')
-                row = 4
-                
-                for line in lines:
+                # Содержание отчета: ячейки по номеру строки, один общий стиль заголовков
+                header_font = Font(bold=True)
+                for row, line in enumerate(content.split('\n'), 4):
                     if line.strip():
-                        worksheet[f'A{row}'] = line.replace('═', '=').replace('║', '|')  # Заменяем спецсимволы
+                        cell = worksheet.cell(row=row, column=1, value=line.translate(_BOX_CHARS_TABLE))  # Заменяем спецсимволы
                         # Выделяем заголовки
-                        if any(marker in line for marker in ['ОТЧЕТ', 'АНАЛИЗ', 'СТАТИСТИКА', '═══']):
-                            worksheet[f'A{row}'].font = Font(bold=True)
-                    row += 1
+                        if _REPORT_HEADER_MARKERS.search(line):
+                            cell.font = header_font
                 
                 # Автоматическая ширина колонок
                 worksheet.column_dimensions['A'].width = 120
@@ -4205,13 +4635,10 @@ class MedicalAnalysisSystem:
             rtf_header = r"""{\rtf1\ansi\deff0 {\fonttbl {\f0 Courier New;}}{\colortbl;\red0\green0\blue0;\red0\green0\blue255;}
 \f0\fs20 """
             
-            # Очищаем содержимое от спецсимволов RTF
-            clean_content = content.replace('\\', '\\\\').replace('{', '\\{').replace('}', '\\}')
-            clean_content = clean_content.replace('═', '=').replace('║', '|')
-            
-            rtf_content = rtf_header + clean_content.replace('\n', r'\par ') + r'}'
+            # Экранирование спецсимволов RTF, замена рамок и переводов строк за один проход
+            rtf_content = rtf_header + content.translate(_RTF_TABLE) + r'}'
             
-            with open(filename, 'w', encoding='utf-8') as f:
+            with open(filename, 'w', encoding='utf-8', buffering=_EXPORT_BUFFER_SIZE) as f:
                 f.write(rtf_content)
                 
             messagebox.showinfo("Успех", f"Отчет сохранен как RTF: {os.path.basename(filename)}")
@@ -4231,7 +4658,7 @@ class MedicalAnalysisSystem:
             return
             
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
+            with open(filename, 'w', encoding='utf-8', buffering=_EXPORT_BUFFER_SIZE) as f:
                 f.write(content)
             
             messagebox.showinfo("Успех", f"Отчет сохранен как текст: {os.path.basename(filename)}")
@@ -4252,66 +4679,58 @@ def generate_test_data():
                 'Петропавловск', 'Актау', 'Кокшетау', 'Семей', 'Талдыкорган']
         diseases = ['ОРВИ', 'Диабет', 'Гипертония']
         
-        data = []
-        record_id = 1
+        # Профили заболеваний: возраст (среднее, σ), гамма-распределение числа случаев
+        # (форма, масштаб) и вес сезонного фактора (0 - без сезонности)
+        profiles = {
+            'ОРВИ': (25, 15, 2, 3, 1.0),
+            'Грипп': (25, 15, 2, 3, 1.0),
+            'Пневмония': (45, 20, 2, 2, 0.7),
+            'Диабет': (55, 12, 1.5, 2, 0.0),
+            'Гипертония': (60, 10, 1.8, 2, 0.0),
+            'Бронхит': (35, 18, 1.5, 2, 0.8),
+            'Астма': (35, 18, 1.5, 2, 0.8),
+        }
+        default_profile = (40, 20, 1.2, 2, 0.0)
         
         print("Генерация тестовых данных...")
         
-        for i, date in enumerate(start_date):
-            if i % 365 == 0:  # Обновляем прогресс каждый год
-                print(f"Обработка {date.year} года...")
-                
-            # Сезонный фактор
-            month = date.month
-            seasonal_factor = 1.8 if month in [11, 12, 1, 2, 3] else 0.6  # Зима vs лето
-            
-            # Генерация записей для каждого дня
-            num_records = np.random.poisson(30)  # Среднее количество записей в день
-            
-            for _ in range(num_records):
-                region = np.random.choice(regions, p=np.random.dirichlet(np.ones(len(regions))))
-                disease = np.random.choice(diseases)
-                
-                # Возраст и количество в зависимости от заболевания
-                if disease in ['ОРВИ', 'Грипп']:
-                    age = np.random.normal(25, 15)
-                    base_count = seasonal_factor * np.random.gamma(2, 3)
-                elif disease == 'Пневмония':
-                    age = np.random.normal(45, 20)
-                    base_count = seasonal_factor * 0.7 * np.random.gamma(2, 2)
-                elif disease == 'Диабет':
-                    age = np.random.normal(55, 12)
-                    base_count = np.random.gamma(1.5, 2)
-                elif disease == 'Гипертония':
-                    age = np.random.normal(60, 10)
-                    base_count = np.random.gamma(1.8, 2)
-                elif disease in ['Бронхит', 'Астма']:
-                    age = np.random.normal(35, 18)
-                    base_count = seasonal_factor * 0.8 * np.random.gamma(1.5, 2)
-                else:
-                    age = np.random.normal(40, 20)
-                    base_count = np.random.gamma(1.2, 2)
-                
-                age = max(1, min(95, int(age)))  # Ограничение возраста
-                count = max(1, int(base_count))
-                
-                # Региональные особенности
-                if region in ['Алматы', 'Астана']:
-                    count = int(count * 1.3)  # Больше случаев в крупных городах
-                elif region in ['Атырау', 'Актау']:
-                    count = int(count * 0.8)  # Меньше в отдаленных регионах
-                
-                data.append({
-                    'ID': record_id,
-                    'Дата': date,
-                    'Регион': region,
-                    'Заболевание': disease,
-                    'Возраст': age,
-                    'Пол': np.random.choice(['М', 'Ж'], p=[0.48, 0.52]),  # Слегка больше женщин
-                    'Количество': count
-                })
-                
-                record_id += 1
+        # Число записей по дням, затем все записи одним набором массивов
+        num_records = np.random.poisson(30, size=len(start_date))  # Среднее количество записей в день
+        total = int(num_records.sum())
+        dates = np.repeat(start_date.values, num_records)
+        months = np.repeat(start_date.month.to_numpy(), num_records)
+        seasonal_factor = np.where(np.isin(months, [11, 12, 1, 2, 3]), 1.8, 0.6)  # Зима vs лето
+        
+        # Регион: выбор с вероятностями из свежего Dirichlet(1, ..., 1) на каждую запись
+        # в среднем равновероятен, поэтому регионы выбираются равномерно
+        region = np.random.choice(regions, size=total)
+        disease_codes = np.random.randint(len(diseases), size=total)
+        disease = np.array(diseases)[disease_codes]
+        
+        # Возраст и количество в зависимости от заболевания
+        params = np.array([profiles.get(d, default_profile) for d in diseases], dtype=float)[disease_codes]
+        age = np.random.normal(params[:, 0], params[:, 1])
+        base_count = np.random.gamma(params[:, 2], params[:, 3])
+        seasonal = params[:, 4] > 0
+        base_count[seasonal] *= seasonal_factor[seasonal] * params[seasonal, 4]
+        
+        age = np.clip(age.astype(np.int64), 1, 95).astype(np.uint8)  # Ограничение возраста
+        count = np.maximum(1, base_count.astype(np.int64))
+        
+        # Региональные особенности: больше случаев в крупных городах, меньше в отдаленных
+        region_factor = np.where(np.isin(region, ['Алматы', 'Астана']), 1.3,
+                                 np.where(np.isin(region, ['Атырау', 'Актау']), 0.8, 1.0))
+        count = (count * region_factor).astype(np.uint16)
+        
+        data = {
+            'ID': np.arange(1, total + 1, dtype=np.uint32),
+            'Дата': dates,
+            'Регион': region,
+            'Заболевание': disease,
+            'Возраст': age,
+            'Пол': np.random.choice(['М', 'Ж'], size=total, p=[0.48, 0.52]),  # Слегка больше женщин
+            'Количество': count
+        }
         
         df = pd.DataFrame(data)
         print(f"Сгенерировано {len(df)} записей")